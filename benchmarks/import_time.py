@@ -0,0 +1,77 @@
+"""Import-time budget check.
+Imports entry modules in fresh interpreters, measures their import time with `python -X importtime`
+and makes sure heavy dependencies are not loaded before they are needed:
+
+    python -m benchmarks.import_time
+"""
+
+import argparse
+import subprocess
+import sys
+
+# Maximal cumulative import time per module in seconds
+IMPORT_BUDGETS = {
+    "main": 0.5,
+    "scraper.douglas_product_scraper": 0.5,
+    "scraper.notino_product_scraper": 0.5,
+}
+
+# Modules that must not be loaded just by importing the entry module
+FORBIDDEN_MODULES = ("pandas", "xlsxwriter", "openpyxl", "selenium", "fake_useragent")
+
+
+def measure_import(module: str) -> tuple:
+    """Import the module in a fresh interpreter
+    Args:
+        module (str): Name of the module to import
+    Returns:
+        tuple: (cumulative import time in seconds, list of loaded forbidden modules,
+            error message or None if the module was imported)
+    """
+    check = (
+        f"import sys, {module}; "
+        f"print(','.join(name for name in {FORBIDDEN_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        # The last line of the traceback, e.g. "ModuleNotFoundError: No module named 'bs4'"
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        return 0.0, [], errors[-1] if errors else f"exit code {result.returncode}"
+    cumulative = 0
+    for line in result.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative = int(parts[1].strip())
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative / 1_000_000, loaded, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time budget of entry modules.")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply all budgets, e.g. for slow machines.")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds, loaded, error = measure_import(module)
+        budget *= args.scale
+        if error:
+            print(f"FAIL {module}: import failed: {error}")
+            failed = True
+            continue
+        status = "OK"
+        if seconds > budget or loaded:
+            status = "FAIL"
+            failed = True
+        print(f"{status} {module}: {seconds:.3f} s (budget {budget:.3f} s)" + (f", loaded {', '.join(loaded)}" if loaded else ""))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
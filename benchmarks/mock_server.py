@@ -0,0 +1,122 @@
+"""Local HTTP stand-in for scraped sites.
+Serves pages recorded by benchmarks/record_fixtures.py with configurable latency,
+429 injection and error rates, so scrapers can be benchmarked without hitting real sites."""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+
+MANIFEST_FILE = "manifest.json"
+
+
+def load_manifest(site_dir: str) -> dict:
+    """Load the manifest of recorded pages of a site
+    Args:
+        site_dir (str): Directory with the recorded fixtures of a single site
+    Returns:
+        dict: The manifest
+    """
+    with open(os.path.join(site_dir, MANIFEST_FILE), encoding="utf-8") as file:
+        return json.load(file)
+
+
+class MockServer:
+    """A threaded HTTP server replaying recorded pages of a single site
+    Attributes:
+        site_dir (str): Directory with the recorded fixtures
+        manifest (dict): Manifest of recorded pages, see record_fixtures.py
+        latency (float): Fixed delay added to every response in seconds
+        jitter (float): Maximal random delay added on top of latency in seconds
+        rate_429 (float): Share of requests answered with 429 Too Many Requests
+        error_rate (float): Share of requests answered with 500 Internal Server Error
+    """
+
+    def __init__(self, site_dir: str, latency: float = 0.0, jitter: float = 0.0,
+                 rate_429: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.site_dir = site_dir
+        self.manifest = load_manifest(site_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.error_rate = error_rate
+        self.random = Random(seed)
+        self.random_lock = threading.Lock()
+        self.bodies = {}
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server, replaces the recorded site origin"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_body(self, path: str) -> bytes:
+        """Get recorded body for the path with site origin rewritten to the local server
+        Args:
+            path (str): Request path including query string
+        Returns:
+            bytes: The response body or None if the page wasn't recorded
+        """
+        if path not in self.bodies:
+            file_name = self.manifest["pages"].get(path)
+            if file_name is None:
+                return None
+            with open(os.path.join(self.site_dir, file_name), "rb") as file:
+                body = file.read()
+            self.bodies[path] = body.replace(self.manifest["origin"].encode(), self.url.encode())
+        return self.bodies[path]
+
+    def choose_status(self) -> int:
+        """Decide whether the next response is a success or an injected failure"""
+        with self.random_lock:
+            roll = self.random.random()
+            delay = self.latency + self.random.uniform(0, self.jitter)
+        time.sleep(delay)
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.error_rate:
+            return 500
+        return 200
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = server.choose_status()
+                body = server.get_body(self.path) if status == 200 else b""
+                if body is None:
+                    status, body = 404, b""
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,132 @@
+"""Record real listing and product pages of Douglas and Notino into benchmark fixtures.
+Run once (it sends real requests with the usual throttling), then benchmark offline with run_benchmark.py:
+
+    python -m benchmarks.record_fixtures --douglas-pages 1 --notino-url https://www.notino.lv/dior/
+"""
+
+import argparse
+import json
+import os
+from urllib.parse import urljoin, urlsplit
+
+from scraper.base_scraper import throttle
+from scraper.douglas_product_scraper import DouglasProductListScraper
+from scraper.exceptions import ScraperError
+
+from logger_config import configure_logging
+
+from benchmarks.mock_server import MANIFEST_FILE
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DOUGLAS_CATALOG_URL = "https://www.douglas.lv/lv/katalogs/"
+
+
+def request_path(url: str) -> str:
+    """Get path with query string of the URL, as seen by the HTTP server"""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+
+class FixtureRecorder:
+    """Stores fetched pages of a single site and writes its manifest
+    Attributes:
+        site_dir (str): Output directory of the site
+        manifest (dict): Manifest of recorded pages
+    """
+
+    def __init__(self, site: str, origin: str):
+        self.site_dir = os.path.join(FIXTURES_DIR, site)
+        os.makedirs(self.site_dir, exist_ok=True)
+        self.manifest = {"origin": origin, "pages": {}, "listing": [], "products": []}
+
+    def record(self, url: str, content: bytes, kind: str):
+        """Store a fetched page
+        Args:
+            url (str): The URL of the page
+            content (bytes): The response body
+            kind (str): "listing" or "products"
+        """
+        path = request_path(url)
+        file_name = f"{len(self.manifest['pages']):04d}.html"
+        with open(os.path.join(self.site_dir, file_name), "wb") as file:
+            file.write(content)
+        self.manifest["pages"][path] = file_name
+        self.manifest[kind].append(path)
+
+    def save(self):
+        """Write the manifest"""
+        with open(os.path.join(self.site_dir, MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=2, ensure_ascii=False)
+
+
+def record_douglas(amount_of_pages: int):
+    """Record Douglas catalog pages and every product page linked from them
+    Args:
+        amount_of_pages (int): Number of catalog pages to record
+    """
+    scraper = DouglasProductListScraper(DOUGLAS_CATALOG_URL)
+    recorder = FixtureRecorder("douglas", "https://www.douglas.lv")
+    recorder.manifest["catalog_path"] = request_path(DOUGLAS_CATALOG_URL)
+
+    for page_number in range(1, amount_of_pages + 1):
+        page_url = scraper.get_page_url(page_number)
+        print(f"Recording Douglas page {page_url}")
+        response = scraper.send_request(page_url)
+        recorder.record(page_url, response.content, "listing")
+
+        for link in scraper.extract_product_links(scraper.parse_html(response)):
+            throttle()
+            try:
+                recorder.record(link, scraper.send_request(link).content, "products")
+            except ScraperError as e:
+                print(f"Skipping {link}: {e}")
+        throttle()
+
+    recorder.save()
+
+
+def record_notino(listing_url: str, amount_of_products: int):
+    """Record a Notino brand page and its product pages
+    Args:
+        listing_url (str): URL of the brand page
+        amount_of_products (int): Maximal number of product pages to record
+    """
+    # Selenium is not needed for recording, the server rendered first page is enough
+    from scraper.notino_product_scraper import NotinoProductListScraper
+
+    scraper = NotinoProductListScraper(listing_url, None)
+    recorder = FixtureRecorder("notino", "https://www.notino.lv")
+
+    print(f"Recording Notino page {listing_url}")
+    response = scraper.send_request(listing_url)
+    recorder.record(listing_url, response.content, "listing")
+
+    links = scraper.extract_product_links(scraper.parse_html(response))[:amount_of_products]
+    for link in links:
+        link = urljoin(listing_url, link)
+        throttle()
+        try:
+            recorder.record(link, scraper.send_request(link).content, "products")
+        except ScraperError as e:
+            print(f"Skipping {link}: {e}")
+
+    recorder.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record pages for offline scraper benchmarks.")
+    parser.add_argument('--douglas-pages', type=int, default=1, help="Number of Douglas catalog pages to record. 0 to skip Douglas.")
+    parser.add_argument('--notino-url', default=None, help="Notino brand page to record. Notino is skipped if not provided.")
+    parser.add_argument('--notino-products', type=int, default=20, help="Maximal number of Notino product pages to record.")
+    args = parser.parse_args()
+
+    configure_logging()
+
+    if args.douglas_pages:
+        record_douglas(args.douglas_pages)
+    if args.notino_url:
+        record_notino(args.notino_url, args.notino_products)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Offline scraper benchmark.
+Replays recorded fixtures through the local mock server and runs
+DouglasProductListScraper.scrape_product_list and the Notino extractors end-to-end,
+reporting pages/sec, products/sec, CPU time and peak RSS:
+
+    python -m benchmarks.run_benchmark --latency 0.05 --rate-429 0.01 --output bench.json
+    python -m benchmarks.run_benchmark --baseline bench.json --max-regression 0.2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from urllib.parse import urljoin
+
+from scraper.base_scraper import set_throttle_range
+from scraper.douglas_product_scraper import DouglasProductListScraper
+from scraper.exceptions import ScraperError
+
+from utils.metrics import metrics
+
+from logger_config import configure_logging
+
+from benchmarks.mock_server import MockServer
+from benchmarks.record_fixtures import FIXTURES_DIR
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the process in megabytes. It never decreases, see run_site()"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(run: callable) -> dict:
+    """Run a benchmark scenario and measure it
+    Args:
+        run (callable): Scenario returning (pages, products, failed_pages)
+    Returns:
+        dict: The scenario report
+    """
+    metrics.reset()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    pages, products, failed_pages = run()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    summary = metrics.summary()
+    return {
+        "pages": pages,
+        "products": products,
+        "failed_pages": failed_pages,
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "pages_per_second": round(pages / wall, 3) if wall else None,
+        "products_per_second": round(products / wall, 3) if wall else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "requests": metrics.get_counter("requests_total"),
+        "http_429": metrics.get_counter("http_429_total"),
+        "histograms": {histogram["name"]: histogram["sum"] for histogram in summary["histograms"] if not histogram["labels"]},
+    }
+
+
+def benchmark_douglas(server: MockServer) -> tuple:
+    """Scrape every recorded Douglas catalog page through the mock server"""
+    manifest = server.manifest
+    scraper = DouglasProductListScraper(server.url + manifest["catalog_path"])
+    pages = products = failed_pages = 0
+    for page_number in range(1, len(manifest["listing"]) + 1):
+        try:
+            products += len(scraper.scrape_product_list(page_number))
+            pages += 1
+        except ScraperError as e:
+            print(f"Douglas page {page_number} failed: {e}")
+            failed_pages += 1
+    return pages, products, failed_pages
+
+
+def benchmark_notino(server: MockServer) -> tuple:
+    """Run Notino listing and product page extractors over the recorded pages through the mock server"""
+    from scraper.notino_product_scraper import NotinoProductListScraper
+
+    manifest = server.manifest
+    listing_url = server.url + manifest["listing"][0]
+    scraper = NotinoProductListScraper(listing_url, None)
+    pages = products = failed_pages = 0
+    try:
+        soup = scraper.parse_html(scraper.send_request(listing_url))
+        scraper.extract_general_product_details(soup)
+        product_links = scraper.extract_product_links(soup)
+        pages += 1
+    except ScraperError as e:
+        print(f"Notino listing failed: {e}")
+        return pages, products, failed_pages + 1
+
+    recorded = set(manifest["products"])
+    for link in product_links:
+        link = urljoin(listing_url, link)
+        if link[len(server.url):] not in recorded:
+            continue
+        try:
+            soup = scraper.parse_html(scraper.send_request(link))
+            scraper.extract_product_details(soup)
+            products += 1
+        except ScraperError as e:
+            print(f"Notino product {link} failed: {e}")
+            failed_pages += 1
+    return pages, products, failed_pages
+
+
+BENCHMARKS = {
+    "douglas": benchmark_douglas,
+    "notino": benchmark_notino,
+}
+
+
+def run_site(site: str, server_options: dict) -> dict:
+    """Benchmark a single site against the mock server.
+    Runs in a fresh process per site, so peak RSS of one site doesn't include the sites before it
+    Args:
+        site (str): Name of the site in BENCHMARKS
+        server_options (dict): Latency and failure injection options of MockServer
+    Returns:
+        dict: The site report
+    """
+    configure_logging()
+    # Throttling only protects real sites, it would dominate the benchmark
+    set_throttle_range(0, 0)
+    with MockServer(os.path.join(FIXTURES_DIR, site), **server_options) as server:
+        return measure(lambda: BENCHMARKS[site](server))
+
+
+def check_regressions(report: dict, baseline: dict, max_regression: float) -> list:
+    """Compare throughput with a baseline report
+    Returns:
+        list: Descriptions of detected regressions
+    """
+    regressions = []
+    for site, result in report.items():
+        previous = baseline.get(site)
+        if not previous or not previous.get("products_per_second"):
+            continue
+        ratio = (result["products_per_second"] or 0) / previous["products_per_second"]
+        if ratio < 1 - max_regression:
+            regressions.append(
+                f"{site}: {result['products_per_second']} products/s vs {previous['products_per_second']} in baseline"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scrapers offline against recorded fixtures.")
+    parser.add_argument('--sites', nargs='+', default=list(BENCHMARKS), help="Sites to benchmark.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Fixed response latency in seconds.")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Maximal random latency added on top of --latency.")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with 500.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for latency and failure injection.")
+    parser.add_argument('--output', default=None, help="Write the report as JSON to the given file.")
+    parser.add_argument('--baseline', default=None, help="Baseline report to compare products/sec with.")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="Allowed relative throughput drop against the baseline.")
+    args = parser.parse_args()
+
+    server_options = {
+        "latency": args.latency, "jitter": args.jitter, "rate_429": args.rate_429,
+        "error_rate": args.error_rate, "seed": args.seed,
+    }
+    # "spawn" starts every site from a clean interpreter instead of a copy of this one
+    context = multiprocessing.get_context("spawn")
+
+    report = {}
+    for site in args.sites:
+        if not os.path.exists(os.path.join(FIXTURES_DIR, site)):
+            print(f"No fixtures for {site}, record them with benchmarks.record_fixtures")
+            continue
+        with context.Pool(1) as pool:
+            report[site] = pool.apply(run_site, (site, server_options))
+        print(f"{site}: {json.dumps(report[site])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = check_regressions(report, json.load(file), args.max_regression)
+        for regression in regressions:
+            print(f"Performance regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Run-wide deduplication of product pages.
+The same product can be listed in several catalog positions and as variants,
+so extracted details are remembered by canonical URL (pages fetched once per run)
+and by hash of the page body (identical pages are not parsed again)."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from data.spill import estimate_size
+from utils.helpers import canonicalize_url
+
+
+def content_hash(content: bytes) -> str:
+    """Hash of a page body
+    Args:
+        content (bytes): The page body
+    Returns:
+        str: Hex digest of the body
+    """
+    return hashlib.sha1(content).hexdigest()
+
+
+class DetailsCache:
+    """Store of extracted product details for a single run
+    Attributes:
+        by_url (dict): Extracted details keyed by canonical URL, also serves as the seen-set
+        by_content (dict): Extracted details keyed by hash of the page body
+        max_size (int): Estimated memory of kept details in bytes, least recently used are evicted first.
+            None is unbounded
+        size (int): Estimated memory of kept details in bytes
+    """
+
+    def __init__(self, max_size_mb: float = None):
+        self.by_url = {}
+        self.by_content = {}
+        self.max_size = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.size = 0
+        # Estimated size of every entry as (store name, key) -> bytes, from the least recently used
+        self._usage = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, store: str, key: str) -> dict:
+        details = getattr(self, store).get(key)
+        if details is not None:
+            self._usage.move_to_end((store, key))
+        return details
+
+    def _put(self, store: str, key: str, details: dict):
+        getattr(self, store)[key] = dict(details)
+        size = estimate_size(details)
+        self.size += size - self._usage.pop((store, key), 0)
+        self._usage[(store, key)] = size
+        # Evict least recently used entries over the budget, the newest one is always kept
+        while self.max_size is not None and self.size > self.max_size and len(self._usage) > 1:
+            (evicted_store, evicted_key), evicted_size = self._usage.popitem(last=False)
+            del getattr(self, evicted_store)[evicted_key]
+            self.size -= evicted_size
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize_url(url) in self.by_url
+
+    def get_by_url(self, url: str) -> dict:
+        """Get details of an already scraped URL
+        Args:
+            url (str): The product URL, not necessarily canonical
+        Returns:
+            dict: Copy of the details or None if the URL wasn't scraped yet
+        """
+        with self._lock:
+            details = self._get("by_url", canonicalize_url(url))
+        return dict(details) if details is not None else None
+
+    def get_by_content(self, content: bytes) -> dict:
+        """Get details extracted from an identical page body
+        Args:
+            content (bytes): The page body
+        Returns:
+            dict: Copy of the details or None if no identical page was parsed yet
+        """
+        with self._lock:
+            details = self._get("by_content", content_hash(content))
+        return dict(details) if details is not None else None
+
+    def add(self, url: str, details: dict, content: bytes = None):
+        """Remember extracted details
+        Args:
+            url (str): The product URL
+            details (dict): The extracted details
+            content (bytes): The page body the details were extracted from
+        """
+        with self._lock:
+            self._put("by_url", canonicalize_url(url), details)
+            if content is not None:
+                self._put("by_content", content_hash(content), details)
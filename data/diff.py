@@ -0,0 +1,220 @@
+"""Change detection between two runs.
+Compares snapshots record by record (price drops/rises, new/removed products, stock flips)
+without loading both runs into memory: key-sorted snapshots are merge-joined in a single pass,
+unsorted ones are compared through an index of record offsets. Both compare only the first
+record of a product key that occurs several times.
+
+    python -m data.diff snapshots/douglas-full-<previous>.jsonl snapshots/douglas-full-<current>.jsonl
+"""
+
+import argparse
+import json
+import os
+
+from data.normalize import parse_price
+from data.storage import product_key, load_snapshot
+
+REPORT_COLUMNS = (
+    ("change", "Change", 14),
+    ("brand", "Brand", 30),
+    ("name", "Product name", 35),
+    ("volume_or_pcs", "Product volume or pcs", 15),
+    ("old_price", "Old price (EUR)", 12),
+    ("new_price", "New price (EUR)", 12),
+    ("price_change", "Price change (EUR)", 12),
+    ("price_change_percent", "Price change (%)", 12),
+    ("url", "URL", 40),
+)
+
+
+def _price(product: dict) -> float:
+    """Numeric price of a product or None (e.g. "MULTIPLE_VALUES" or not available)"""
+    price = product.get("price")
+    if isinstance(price, bool):
+        return None
+    return parse_price(price)[0]
+
+
+def _change(change: str, key: str, product: dict, **values) -> dict:
+    record = {
+        "change": change,
+        "key": key,
+        "url": product.get("url"),
+        "brand": product.get("brand"),
+        "name": product.get("name"),
+        "volume_or_pcs": product.get("volume_or_pcs"),
+    }
+    record.update(values)
+    return record
+
+
+def compare_products(key: str, previous: dict, current: dict) -> list:
+    """Compare two records of the same product
+    Args:
+        key (str): The product key
+        previous (dict): Record of the previous run
+        current (dict): Record of the current run
+    Returns:
+        list: Change records (price drop/rise, stock flip), empty if nothing changed
+    """
+    changes = []
+    old_price, new_price = _price(previous), _price(current)
+    if old_price is not None and new_price is not None and old_price != new_price:
+        difference = round(new_price - old_price, 2)
+        changes.append(_change(
+            "price_drop" if difference < 0 else "price_rise", key, current,
+            old_price=old_price, new_price=new_price, price_change=difference,
+            price_change_percent=round(difference / old_price * 100, 1) if old_price else None,
+        ))
+
+    was_in_stock, is_in_stock = previous.get("in_stock"), current.get("in_stock")
+    if isinstance(was_in_stock, bool) and isinstance(is_in_stock, bool) and was_in_stock != is_in_stock:
+        changes.append(_change(
+            "back_in_stock" if is_in_stock else "out_of_stock", key, current,
+            old_price=old_price, new_price=new_price,
+        ))
+    return changes
+
+
+def _keyed(snapshot_path: str):
+    """Yield (key, record) pairs of a key-sorted snapshot, checking the order.
+    Only the first record of a duplicated key is yielded, as in diff_indexed_snapshots()"""
+    previous_key = None
+    for product in load_snapshot(snapshot_path):
+        key = product_key(product)
+        if previous_key is not None and key < previous_key:
+            raise ValueError(f"Snapshot {snapshot_path} is not sorted by product key, use diff_indexed_snapshots()")
+        if key == previous_key:
+            continue
+        previous_key = key
+        yield key, product
+
+
+def diff_sorted_snapshots(previous_path: str, current_path: str):
+    """Merge-join two key-sorted snapshots, keeping only one record of each in memory
+    Args:
+        previous_path (str): Snapshot of the previous run
+        current_path (str): Snapshot of the current run
+    Yields:
+        dict: Change records
+    """
+    previous_records, current_records = _keyed(previous_path), _keyed(current_path)
+    previous, current = next(previous_records, None), next(current_records, None)
+    while previous is not None or current is not None:
+        if current is None or (previous is not None and previous[0] < current[0]):
+            yield _change("removed", previous[0], previous[1], old_price=_price(previous[1]))
+            previous = next(previous_records, None)
+        elif previous is None or current[0] < previous[0]:
+            yield _change("new", current[0], current[1], new_price=_price(current[1]))
+            current = next(current_records, None)
+        else:
+            yield from compare_products(current[0], previous[1], current[1])
+            previous, current = next(previous_records, None), next(current_records, None)
+
+
+def diff_indexed_snapshots(previous_path: str, current_path: str):
+    """Compare snapshots in any order. Only keys and file offsets of the previous run are kept in memory
+    Args:
+        previous_path (str): Snapshot of the previous run
+        current_path (str): Snapshot of the current run
+    Yields:
+        dict: Change records
+    """
+    index = {}
+    with open(previous_path, "rb") as file:
+        offset = file.tell()
+        for line in iter(file.readline, b""):
+            if line.strip():
+                # The first record of a duplicated key is compared, as in diff_sorted_snapshots()
+                index.setdefault(product_key(json.loads(line)), offset)
+            offset = file.tell()
+
+    seen = set()
+    with open(previous_path, "rb") as previous_file:
+        for product in load_snapshot(current_path):
+            key = product_key(product)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key not in index:
+                yield _change("new", key, product, new_price=_price(product))
+                continue
+            previous_file.seek(index[key])
+            yield from compare_products(key, json.loads(previous_file.readline()), product)
+
+        for key, offset in index.items():
+            if key not in seen:
+                previous_file.seek(offset)
+                previous = json.loads(previous_file.readline())
+                yield _change("removed", key, previous, old_price=_price(previous))
+
+
+def write_diff_report(changes, jsonl_path: str, xlsx_path: str = None) -> dict:
+    """Write change records as JSON lines and optionally as an Excel sheet, row by row
+    Args:
+        changes: Iterable of change records
+        jsonl_path (str): Path of the JSONL report
+        xlsx_path (str): Path of the Excel report, skipped if not provided
+    Returns:
+        dict: Number of changes per change type
+    """
+    counts = {}
+    os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+
+    workbook = worksheet = None
+    if xlsx_path:
+        import xlsxwriter
+
+        # Constant memory mode flushes every finished row to disk
+        workbook = xlsxwriter.Workbook(xlsx_path, {"constant_memory": True})
+        worksheet = workbook.add_worksheet("Changes")
+        for col_idx, (_, header, width) in enumerate(REPORT_COLUMNS):
+            worksheet.set_column(col_idx, col_idx, width)
+            worksheet.write(0, col_idx, header)
+
+    with open(jsonl_path, "w", encoding="utf-8") as file:
+        for row_idx, change in enumerate(changes, start=1):
+            counts[change["change"]] = counts.get(change["change"], 0) + 1
+            file.write(json.dumps(change, ensure_ascii=False) + "\n")
+            if worksheet is not None:
+                for col_idx, (field, _, _) in enumerate(REPORT_COLUMNS):
+                    value = change.get(field)
+                    if value is not None:
+                        worksheet.write(row_idx, col_idx, value)
+
+    if workbook is not None:
+        workbook.close()
+    return counts
+
+
+def diff_snapshots(previous_path: str, current_path: str, jsonl_path: str, xlsx_path: str = None,
+                   sorted_input: bool = True) -> dict:
+    """Compare two snapshots and write the change report
+    Args:
+        previous_path (str): Snapshot of the previous run
+        current_path (str): Snapshot of the current run
+        jsonl_path (str): Path of the JSONL report
+        xlsx_path (str): Path of the Excel report, skipped if not provided
+        sorted_input (bool): Snapshots are sorted by product key (as written by data.storage.save_snapshot)
+    Returns:
+        dict: Number of changes per change type
+    """
+    diff = diff_sorted_snapshots if sorted_input else diff_indexed_snapshots
+    return write_diff_report(diff(previous_path, current_path), jsonl_path, xlsx_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report changes between two snapshots.")
+    parser.add_argument('previous', help="Snapshot of the previous run.")
+    parser.add_argument('current', help="Snapshot of the current run.")
+    parser.add_argument('--jsonl', default="changes.jsonl", help="Path of the JSONL report.")
+    parser.add_argument('--xlsx', default="changes.xlsx", help="Path of the Excel report.")
+    parser.add_argument('--unsorted', action='store_true', help="Snapshots are not sorted by product key.")
+    args = parser.parse_args()
+
+    counts = diff_snapshots(args.previous, args.current, args.jsonl, args.xlsx, sorted_input=not args.unsorted)
+    print(f"Changes: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Image download pipeline.
+Product images are downloaded in background threads while the text crawl goes on,
+stored once per content (files are named by hash of their bytes), re-downloaded only if
+changed (ETag / Last-Modified) and optionally resized to thumbnails in a process pool."""
+
+import hashlib
+import importlib.util
+import json
+import mimetypes
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from requests.exceptions import RequestException
+
+from scraper.base_scraper import fetch_with_retries, random_user_agent, throttle
+from utils.metrics import metrics
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+IMAGES_DIR = "images"
+INDEX_FILE = "index.json"
+
+
+def make_thumbnail(image_path: str, thumbnail_path: str, size: int) -> str:
+    """Resize an image to fit into a square of the given size. Runs in a worker process
+    Args:
+        image_path (str): Path of the original image
+        thumbnail_path (str): Path of the thumbnail to write
+        size (int): Maximal width and height in pixels
+    Returns:
+        str: Path of the thumbnail
+    """
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        image.thumbnail((size, size))
+        image.convert("RGB").save(thumbnail_path, "JPEG", quality=85)
+    return thumbnail_path
+
+
+class ImagePipeline:
+    """Downloads product images concurrently with the crawl
+    Attributes:
+        images_dir (str): Directory of stored images
+        thumbnail_size (int): Size of thumbnails in pixels, None to skip thumbnails
+        index (dict): Stored image per URL with its ETag and Last-Modified, kept between runs
+        results (dict): Stored image path per URL for this run
+    """
+
+    def __init__(self, images_dir: str = IMAGES_DIR, max_workers: int = 4, thumbnail_size: int = None):
+        self.images_dir = images_dir
+        os.makedirs(images_dir, exist_ok=True)
+        self.index_path = os.path.join(images_dir, INDEX_FILE)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as file:
+                self.index = json.load(file)
+
+        if thumbnail_size and importlib.util.find_spec("PIL") is None:
+            logger.warning("Pillow is not installed, thumbnails are disabled")
+            thumbnail_size = None
+        self.thumbnail_size = thumbnail_size
+
+        self.results = {}
+        self.futures = {}
+        self.thumbnail_futures = []
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="images")
+        # Worker processes are spawned, forking this process while download and logging threads run can deadlock
+        self.thumbnail_executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) \
+            if thumbnail_size else None
+
+    def submit(self, product: dict):
+        """Schedule download of product images, every URL is downloaded once per run
+        Args:
+            product (dict): The product details with "image_urls"
+        """
+        for url in product.get("image_urls") or []:
+            with self._lock:
+                if url in self.futures:
+                    continue
+                self.futures[url] = self.executor.submit(self.download, url)
+
+    def get_stored_path(self, content: bytes, url: str, content_type: str) -> str:
+        """Content addressed path of an image: identical images share one file"""
+        digest = hashlib.sha256(content).hexdigest()
+        extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) \
+            or os.path.splitext(urlsplit(url).path)[1] or ".jpg"
+        return os.path.join(self.images_dir, digest[:2], digest + extension)
+
+    def download(self, url: str) -> str:
+        """Download a single image unless it didn't change since the last run
+        Args:
+            url (str): The image URL
+        Returns:
+            str: Path of the stored image or None if download failed
+        """
+        with self._lock:
+            previous = self.index.get(url)
+        headers = {"User-Agent": random_user_agent()}
+        if previous and os.path.exists(previous["path"]):
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+        try:
+            throttle()  # Workers pause like the crawl does, so parallel downloads don't trigger 429 errors
+            # Image requests are counted apart from page requests, see fetch()
+            response = fetch_with_retries(url, headers, metric_prefix="image_")
+        except RequestException as e:
+            logger.warning("Failed to download image %s: %s", url, e)
+            metrics.increment("images_total", result="failed")
+            return None
+
+        if response.status_code == 304:
+            metrics.increment("images_total", result="not_modified")
+            path = previous["path"]
+        else:
+            path = self.get_stored_path(response.content, url, response.headers.get("Content-Type"))
+            if os.path.exists(path):
+                metrics.increment("images_total", result="duplicate")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as file:
+                    file.write(response.content)
+                metrics.increment("images_total", result="downloaded")
+
+        with self._lock:
+            self.index[url] = {
+                "path": path,
+                "etag": response.headers.get("ETag", previous.get("etag") if previous else None),
+                "last_modified": response.headers.get("Last-Modified", previous.get("last_modified") if previous else None),
+            }
+            self.results[url] = path
+
+        if self.thumbnail_executor is not None:
+            thumbnail_path = os.path.splitext(path)[0] + f"_{self.thumbnail_size}.jpg"
+            if not os.path.exists(thumbnail_path):
+                with self._lock:
+                    self.thumbnail_futures.append(
+                        self.thumbnail_executor.submit(make_thumbnail, path, thumbnail_path, self.thumbnail_size)
+                    )
+        return path
+
+    def finish(self) -> dict:
+        """Wait for scheduled downloads and thumbnails and save the index
+        Returns:
+            dict: Stored image path per URL
+        """
+        self.executor.shutdown(wait=True)
+        for url, future in self.futures.items():
+            # Request errors are handled in download(), anything else (e.g. failed write) ends up here
+            error = future.exception()
+            if error is not None:
+                logger.error("Failed to store image %s: %r", url, error)
+                metrics.increment("images_total", result="failed")
+        if self.thumbnail_executor is not None:
+            for future in self.thumbnail_futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.warning("Failed to make thumbnail: %s", e)
+            self.thumbnail_executor.shutdown(wait=True)
+
+        with open(self.index_path, "w", encoding="utf-8") as file:
+            json.dump(self.index, file, indent=2, ensure_ascii=False)
+        return dict(self.results)
+
+    def attach_to_product(self, product: dict):
+        """Add paths of stored images to a product as "image_files" if any were downloaded"""
+        files = [self.results[url] for url in product.get("image_urls") or [] if self.results.get(url)]
+        if files:
+            product["image_files"] = files
+
+    def attach(self, products):
+        """Add paths of stored images to products as "image_files"
+        Args:
+            products (list | data.spill.SpillBuffer): The product details with "image_urls"
+        """
+        if hasattr(products, "update_records"):
+            # Spilled records are rewritten on disk
+            products.update_records(self.attach_to_product)
+            return
+        for product in products:
+            self.attach_to_product(product)
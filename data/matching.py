@@ -0,0 +1,252 @@
+"""Cross-site product matching for price comparison.
+Brand, name and volume of every product are normalised, products are grouped into blocks
+by brand and normalised volume, and fuzzy name matching runs only inside a block between
+products sharing at least one name token, so the cost stays close to linear in catalog size.
+
+    python -m data.matching douglas=snapshots/douglas-full-<run>.jsonl notino=snapshots/notino-full-<run>.jsonl
+"""
+
+import argparse
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from data.normalize import VOLUME_PATTERN, parse_volume
+from data.storage import load_snapshot
+
+# Minimal similarity of names for products to be considered the same
+MATCH_THRESHOLD = 0.75
+
+# Alternative spellings of brands, mapped to one normalised name
+BRAND_ALIASES = {
+    "ysl": "yves saint laurent",
+    "ck": "calvin klein",
+    "d&g": "dolce gabbana",
+    "dolce & gabbana": "dolce gabbana",
+    "lancome paris": "lancome",
+}
+
+# Phrases written differently by sites, replaced in names before tokenizing
+NAME_ABBREVIATIONS = {
+    "eau de parfum": "edp",
+    "parfimerijas udens": "edp",
+    "eau de toilette": "edt",
+    "tualetes udens": "edt",
+    "eau de cologne": "edc",
+    "odekolons": "edc",
+}
+
+NON_WORD_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+def _ascii(text: str) -> str:
+    """Lowercase text without diacritics (e.g. "Lancôme" -> "lancome")"""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def normalize_brand(brand: str) -> str:
+    """Normalise a brand name, e.g. "Dolce & Gabbana" and "D&G" -> "dolce gabbana"
+    Args:
+        brand (str): The brand as scraped
+    Returns:
+        str: The normalised brand
+    """
+    brand = _ascii(brand).strip()
+    brand = BRAND_ALIASES.get(brand, brand)
+    return NON_WORD_PATTERN.sub(" ", brand).strip()
+
+
+def normalize_volume(volume: str) -> str:
+    """Normalise volume or amount of pieces to base units, e.g. "0,1 l" -> "100ml", "2 gab." -> "2pcs"
+    Args:
+        volume (str): The volume as scraped
+    Returns:
+        str: The normalised volume or None if it can't be recognised
+    """
+    value, unit = parse_volume(_ascii(volume))
+    if value is None:
+        return None
+    return f"{value:g}{unit}"
+
+
+def name_tokens(name: str, brand: str) -> list:
+    """Normalised name tokens without brand and volume tokens
+    Args:
+        name (str): The product name as scraped
+        brand (str): The normalised brand
+    Returns:
+        list: Sorted unique tokens
+    """
+    text = NON_WORD_PATTERN.sub(" ", VOLUME_PATTERN.sub(" ", _ascii(name)))
+    for phrase, abbreviation in NAME_ABBREVIATIONS.items():
+        text = text.replace(phrase, abbreviation)
+    brand_tokens = set(brand.split())
+    return sorted({token for token in text.split() if token not in brand_tokens})
+
+
+def normalize_product(product: dict, site: str) -> dict:
+    """Prepare a product for matching
+    Args:
+        product (dict): The product details
+        site (str): Name of the site the product comes from
+    Returns:
+        dict: The product with site and normalised brand, volume and name tokens
+    """
+    brand = normalize_brand(product.get("brand"))
+    if product.get("volume_value") and product.get("volume_unit"):
+        # Already normalised by data.normalize
+        volume = f"{float(product['volume_value']):g}{product['volume_unit']}"
+    else:
+        volume = normalize_volume(product.get("volume_or_pcs") or product.get("volume") or "") \
+            or normalize_volume(product.get("name") or "")
+    tokens = name_tokens(product.get("name"), brand)
+    return {"site": site, "product": product, "brand": brand, "volume": volume, "tokens": tokens}
+
+
+def name_similarity(left: dict, right: dict) -> float:
+    """Similarity of two normalised products' names between 0 and 1.
+    Average of token overlap (Jaccard) and character sequence similarity of the token strings"""
+    left_tokens, right_tokens = set(left["tokens"]), set(right["tokens"])
+    if not left_tokens or not right_tokens:
+        return 0.0
+    jaccard = len(left_tokens & right_tokens) / len(left_tokens | right_tokens)
+    sequence = SequenceMatcher(None, " ".join(left["tokens"]), " ".join(right["tokens"])).ratio()
+    return (jaccard + sequence) / 2
+
+
+def build_blocks(products) -> dict:
+    """Group normalised products by brand and volume
+    Args:
+        products: Iterable of normalised products
+    Returns:
+        dict: Lists of products keyed by (brand, volume)
+    """
+    blocks = {}
+    for product in products:
+        if product["brand"]:
+            blocks.setdefault((product["brand"], product["volume"]), []).append(product)
+    return blocks
+
+
+def match_blocks(left_blocks: dict, right_blocks: dict, threshold: float = MATCH_THRESHOLD) -> list:
+    """Match products of two sites inside shared blocks, one to one, best scores first
+    Args:
+        left_blocks (dict): Blocks of the first site
+        right_blocks (dict): Blocks of the second site
+        threshold (float): Minimal name similarity
+    Returns:
+        list: (left product, right product, score) tuples
+    """
+    matches = []
+    for block_key, left_products in left_blocks.items():
+        right_products = right_blocks.get(block_key)
+        if not right_products:
+            continue
+
+        # Compare only products sharing a name token
+        token_index = {}
+        for right_idx, right in enumerate(right_products):
+            for token in right["tokens"]:
+                token_index.setdefault(token, set()).add(right_idx)
+
+        candidates = []
+        for left_idx, left in enumerate(left_products):
+            right_indexes = set()
+            for token in left["tokens"]:
+                right_indexes |= token_index.get(token, set())
+            for right_idx in right_indexes:
+                score = name_similarity(left, right_products[right_idx])
+                if score >= threshold:
+                    candidates.append((score, left_idx, right_idx))
+
+        used_left, used_right = set(), set()
+        for score, left_idx, right_idx in sorted(candidates, reverse=True):
+            if left_idx in used_left or right_idx in used_right:
+                continue
+            used_left.add(left_idx)
+            used_right.add(right_idx)
+            matches.append((left_products[left_idx], right_products[right_idx], round(score, 3)))
+    return matches
+
+
+def build_comparison(sites: dict, threshold: float = MATCH_THRESHOLD) -> list:
+    """Build price comparison table of products across sites.
+    The first site is the reference, products of other sites are matched to it.
+    Args:
+        sites (dict): Iterable of product details per site name
+        threshold (float): Minimal name similarity
+    Returns:
+        list: Rows with reference brand, name and volume, and price, name and match score per site
+    """
+    site_names = list(sites)
+    reference_site = site_names[0]
+    reference = [normalize_product(product, reference_site) for product in sites[reference_site]]
+    reference_blocks = build_blocks(reference)
+
+    rows = {}
+    for normalized in reference:
+        rows[id(normalized)] = {
+            "brand": normalized["product"].get("brand"),
+            "name": normalized["product"].get("name"),
+            "volume": normalized["volume"],
+            f"{reference_site}_price": normalized["product"].get("price"),
+        }
+
+    for site in site_names[1:]:
+        blocks = build_blocks(normalize_product(product, site) for product in sites[site])
+        for left, right, score in match_blocks(reference_blocks, blocks, threshold):
+            row = rows[id(left)]
+            row[f"{site}_name"] = right["product"].get("name")
+            row[f"{site}_price"] = right["product"].get("price")
+            row[f"{site}_score"] = score
+
+    return list(rows.values())
+
+
+def save_comparison_to_excel(rows: list, sites: list, file_path: str):
+    """Write the comparison table to an Excel sheet
+    Args:
+        rows (list): Rows from build_comparison()
+        sites (list): Site names in the order of build_comparison()
+        file_path (str): Path of the Excel file
+    """
+    import xlsxwriter
+
+    columns = [("brand", "Brand", 30), ("name", "Product name", 35), ("volume", "Volume", 12),
+               (f"{sites[0]}_price", f"{sites[0]} price (EUR)", 12)]
+    for site in sites[1:]:
+        columns += [(f"{site}_name", f"{site} name", 35), (f"{site}_price", f"{site} price (EUR)", 12),
+                    (f"{site}_score", f"{site} match score", 10)]
+
+    workbook = xlsxwriter.Workbook(file_path, {"constant_memory": True})
+    worksheet = workbook.add_worksheet("Comparison")
+    for col_idx, (_, header, width) in enumerate(columns):
+        worksheet.set_column(col_idx, col_idx, width)
+        worksheet.write(0, col_idx, header)
+    for row_idx, row in enumerate(rows, start=1):
+        for col_idx, (field, _, _) in enumerate(columns):
+            if row.get(field) is not None:
+                worksheet.write(row_idx, col_idx, row[field])
+    workbook.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match products across sites and build a price comparison table.")
+    parser.add_argument('snapshots', nargs='+', help="Snapshots as site=path, the first site is the reference.")
+    parser.add_argument('-o', '--output', default="comparison.xlsx", help="Path of the Excel comparison table.")
+    parser.add_argument('--threshold', type=float, default=MATCH_THRESHOLD, help="Minimal name similarity (0-1).")
+    args = parser.parse_args()
+
+    sites = {}
+    for argument in args.snapshots:
+        site, _, path = argument.partition("=")
+        sites[site] = load_snapshot(path)
+
+    rows = build_comparison(sites, args.threshold)
+    save_comparison_to_excel(rows, list(sites), args.output)
+    print(f"Saved comparison of {len(rows)} products to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
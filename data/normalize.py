@@ -0,0 +1,111 @@
+"""Normalisation of scraped records.
+Extractors keep raw texts (e.g. "12,50 €", "50 ml", "MULTIPLE_VALUES") that are cleaned into typed fields:
+price/old_price (float), currency, price_note (non-numeric price text),
+volume_value (float) with volume_unit (ml, g or pcs) and in_stock (bool).
+All prices of scraped pages (listings, structured data, variants) are parsed by parse_price(),
+so comma decimals and thousands separators are handled the same way everywhere."""
+
+import re
+
+# Thousands separator: "." or "," followed by exactly three digits and another separator or the end
+THOUSANDS_SEPARATOR_PATTERN = re.compile(r"[.,\s](?=\d{3}(?:[.,]|$))")
+NON_NUMBER_PATTERN = re.compile(r"[^\d.,\s-]")
+WHITESPACE_PATTERN = re.compile(r"\s")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+CURRENCY_PATTERNS = {"EUR": re.compile(r"€|EUR"), "USD": re.compile(r"\$|USD"), "GBP": re.compile(r"£|GBP")}
+
+# Volume or amount of pieces, e.g. "50 ml", "0,1 l", "2 gab.". The unit must not continue as a word (e.g. "L'Eau")
+VOLUME_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(ml|l|kg|gr|g|gab\.?|pcs|x)(?![a-z'’])", re.IGNORECASE)
+VOLUME_UNITS = {
+    "ml": ("ml", 1), "l": ("ml", 1000),
+    "g": ("g", 1), "gr": ("g", 1), "kg": ("g", 1000),
+    "gab": ("pcs", 1), "gab.": ("pcs", 1), "pcs": ("pcs", 1), "x": ("pcs", 1),
+}
+
+# Currency of prices shown without a currency sign
+DEFAULT_CURRENCY = "EUR"
+
+
+def parse_price(value) -> tuple:
+    """Parse a single price, handling "12,50 €", "1.234,56", "12.50" and numbers
+    Args:
+        value: Raw price text or number
+    Returns:
+        tuple: (float price or None, raw text if it is not a number or None)
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value), None
+    text = str(value).strip()
+    cleaned = THOUSANDS_SEPARATOR_PATTERN.sub("", NON_NUMBER_PATTERN.sub("", text).strip())
+    cleaned = WHITESPACE_PATTERN.sub("", cleaned.replace(",", "."))
+    if NUMBER_PATTERN.fullmatch(cleaned):
+        return float(cleaned), None
+    return None, text or None
+
+
+def find_currency(value) -> str:
+    """Currency code of the first currency sign in a raw price or None"""
+    if value is None:
+        return None
+    text = str(value)
+    for code, pattern in CURRENCY_PATTERNS.items():
+        if pattern.search(text):
+            return code
+    return None
+
+
+def parse_volume(value) -> tuple:
+    """Parse a volume to value and base unit, e.g. "0,1 l" -> (100.0, "ml"), "2 gab." -> (2.0, "pcs")
+    Returns:
+        tuple: (float value, unit name) or (None, None) if no volume is found
+    """
+    match = VOLUME_PATTERN.search(str(value)) if value is not None else None
+    if match is None:
+        return None, None
+    unit, multiplier = VOLUME_UNITS[match.group(2).lower()]
+    return float(match.group(1).replace(",", ".")) * multiplier, unit
+
+
+def normalize_record(record: dict) -> dict:
+    """Normalise prices, currency, volume and stock status of a single record
+    Args:
+        record (dict): Product details with raw "price", "old_price", "currency", "volume_or_pcs"/"volume", "in_stock"
+    Returns:
+        dict: The same details with typed values, missing values are left out
+    """
+    record = dict(record)
+    if "price" in record:
+        raw_price = record["price"]
+        record["price"], note = parse_price(raw_price)
+        record["price_note"] = note if note is not None else record.get("price_note")
+
+        currency = record.get("currency") or find_currency(raw_price)
+        if currency is None and record["price"] is not None:
+            currency = DEFAULT_CURRENCY
+        record["currency"] = currency
+
+        # Product without a numeric price (e.g. "coming soon") can't be bought
+        if record.get("in_stock") is None:
+            record["in_stock"] = record["price"] is not None
+        record["in_stock"] = bool(record["in_stock"])
+
+    if "old_price" in record:
+        record["old_price"], _ = parse_price(record["old_price"])
+
+    volume_column = "volume_or_pcs" if "volume_or_pcs" in record else "volume" if "volume" in record else None
+    if volume_column:
+        record["volume_value"], record["volume_unit"] = parse_volume(record[volume_column])
+
+    return {key: value for key, value in record.items() if value is not None}
+
+
+def normalize_records(records: list) -> list:
+    """Normalise a page of records, see normalize_record()
+    Args:
+        records (list): Product details dictionaries with raw values
+    Returns:
+        list: Product details with typed values, missing values are left out
+    """
+    return [normalize_record(record) for record in records]
@@ -0,0 +1,149 @@
+"""Memory-bounded storage of scraped records.
+Records are kept in memory until their estimated size exceeds the memory budget,
+then they are sorted by product key and spilled to a JSON lines chunk on disk.
+At the end chunks are read back one record at a time (or merged in key order),
+so peak memory doesn't grow with the number of scraped pages and sites."""
+
+import heapq
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from data.storage import product_key
+from utils.metrics import metrics
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def estimate_size(record: dict) -> int:
+    """Rough size of a record in memory in bytes (dictionary, keys and values, one level of lists)"""
+    size = sys.getsizeof(record)
+    for key, value in record.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+        if isinstance(value, (list, tuple)):
+            size += sum(sys.getsizeof(item) for item in value)
+    return size
+
+
+class SpillBuffer:
+    """List-like buffer of records with a memory budget
+    Attributes:
+        memory_budget (int): Budget in bytes, None keeps everything in memory
+        records (list): Records currently kept in memory
+        chunk_paths (list): Paths of spilled chunks, each sorted by product key
+        columns (list): All record keys in order of first appearance
+    """
+
+    def __init__(self, memory_budget_mb: float = None, spill_dir: str = None):
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self.spill_dir = spill_dir
+        self._owns_spill_dir = False
+        self.records = []
+        self.records_size = 0
+        self.chunk_paths = []
+        self.columns = []
+        self._known_columns = set()
+        self._length = 0
+
+    @property
+    def spilled(self) -> bool:
+        """Whether any records were written to disk"""
+        return bool(self.chunk_paths)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _track_columns(self, record: dict):
+        for key in record:
+            if key not in self._known_columns:
+                self._known_columns.add(key)
+                self.columns.append(key)
+
+    def append(self, record: dict):
+        """Add a record, spilling buffered records to disk once the budget is exceeded"""
+        self._track_columns(record)
+        self.records.append(record)
+        self._length += 1
+        if self.memory_budget is not None:
+            self.records_size += estimate_size(record)
+            if self.records_size > self.memory_budget:
+                self.spill()
+
+    def extend(self, records):
+        """Add records from an iterable"""
+        for record in records:
+            self.append(record)
+
+    def spill(self):
+        """Write records kept in memory to a new chunk sorted by product key and release them"""
+        if not self.records:
+            return
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="scraper-spill-")
+            self._owns_spill_dir = True
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"chunk-{len(self.chunk_paths):05d}.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            for record in sorted(self.records, key=product_key):
+                file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        logger.info("Spilled %d records (~%d kB) to %s", len(self.records), self.records_size // 1024, path)
+        metrics.increment("spilled_records_total", len(self.records))
+        self.chunk_paths.append(path)
+        self.records = []
+        self.records_size = 0
+
+    @staticmethod
+    def _read_chunk(path: str):
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                yield json.loads(line)
+
+    def __iter__(self):
+        """Iterate over all records, spilled chunks first. Records of every chunk are in key order,
+        use iter_sorted() for the order of the whole buffer"""
+        for path in self.chunk_paths:
+            yield from self._read_chunk(path)
+        yield from self.records
+
+    def iter_sorted(self):
+        """Iterate over all records in product key order, merging sorted chunks one record at a time"""
+        sources = [self._read_chunk(path) for path in self.chunk_paths]
+        sources.append(iter(sorted(self.records, key=product_key)))
+        return heapq.merge(*sources, key=product_key)
+
+    def update_records(self, update: callable):
+        """Apply an in-place update function to every record, rewriting spilled chunks
+        Args:
+            update (callable): Function modifying a record dictionary
+        """
+        for path in self.chunk_paths:
+            updated_path = path + ".tmp"
+            with open(updated_path, "w", encoding="utf-8") as file:
+                for record in self._read_chunk(path):
+                    update(record)
+                    self._track_columns(record)
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(updated_path, path)
+        for record in self.records:
+            update(record)
+            self._track_columns(record)
+
+    def close(self):
+        """Delete spilled chunks, and the temporary directory if the buffer created it"""
+        if self._owns_spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+        else:
+            for path in self.chunk_paths:
+                if os.path.exists(path):
+                    os.remove(path)
+        self.chunk_paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,294 @@
+"""Functions for storing scraped products (e.g. Excel) and run snapshots.
+Heavy dependencies (pandas, xlsxwriter) are imported only when a sink is actually used."""
+
+import os
+import json
+import glob
+from datetime import datetime
+
+from data.normalize import parse_price
+
+SNAPSHOTS_DIR = "snapshots"
+
+# Fields shown in catalog listing pages, refreshed by the listing-only price sweep
+LISTING_FIELDS = (
+    "name", "brand", "type", "price", "old_price", "price_note", "currency", "in_stock",
+    "volume_or_pcs", "volume_value", "volume_unit",
+)
+
+# Fields differing between volume variants of the same product
+VARIANT_FIELDS = ("price", "old_price", "price_note", "in_stock", "volume_or_pcs", "volume_value", "volume_unit", "sku")
+
+
+# Excel headers and column widths of product fields
+EXCEL_COLUMN_MAPPING = {
+    "brand": ("Brand", 30),
+    "name": ("Product name", 35),
+    "price": ("Price (EUR)", 10),
+    "old_price": ("Old price (EUR)", 10),
+    "price_note": ("Price note", 20),
+    "type": ("Type", 10),
+    "volume_or_pcs": ("Product volume or pcs", 15),
+    "in_stock": ("Is in stock", 10),
+    "tag_name": ("Tag name", 25),
+    "tag_list": ("Tags", 30),
+    "about": ("About", 50),
+    "url": ("URL", 40)
+}
+
+
+def _add_stock_formats(workbook, worksheet, col_idx: int, last_row: int):
+    """Apply conditional formatting for "Is in stock" column"""
+    worksheet.conditional_format(1, col_idx, last_row, col_idx, {
+        'type': 'cell',
+        'criteria': '==',
+        'value': True,
+        'format': workbook.add_format({'bg_color': 'green'})
+    })
+    worksheet.conditional_format(1, col_idx, last_row, col_idx, {
+        'type': 'cell',
+        'criteria': '==',
+        'value': False,
+        'format': workbook.add_format({'bg_color': 'red'})
+    })
+
+
+def save_products_to_excel_streaming(products, columns: list, file_path: str = "products.xlsx"):
+    """Write products to an Excel file row by row without building a DataFrame
+    Args:
+        products: Iterable of product details, e.g. a data.spill.SpillBuffer read back from disk
+        columns (list): Product fields in column order
+        file_path (str): Path of the Excel file
+    """
+    import xlsxwriter
+
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+    # Constant memory mode flushes every finished row to disk
+    workbook = xlsxwriter.Workbook(file_path, {"constant_memory": True})
+    worksheet = workbook.add_worksheet('Sheet1')
+    price_format = workbook.add_format({'num_format': '0.00'})
+    for col_idx, col in enumerate(columns):
+        header, width = EXCEL_COLUMN_MAPPING.get(col, (col, None))
+        if width is not None:
+            worksheet.set_column(col_idx, col_idx, width, price_format if col in ("price", "old_price") else None)
+        worksheet.write(0, col_idx, header)
+
+    row_idx = 0
+    for row_idx, product in enumerate(products, start=1):
+        for col_idx, col in enumerate(columns):
+            value = product.get(col)
+            if isinstance(value, list):
+                value = "\n".join(map(str, value))
+            if value is not None:
+                worksheet.write(row_idx, col_idx, value)
+
+    if "in_stock" in columns:
+        _add_stock_formats(workbook, worksheet, columns.index("in_stock"), row_idx)
+    workbook.close()
+
+
+def save_products_to_excel(products):
+    """Save a list of products to an Excel file.
+    Products spilled to disk (data.spill.SpillBuffer) are streamed row by row in product key order,
+    as catalog order isn't kept across sorted chunks"""
+    if getattr(products, "spilled", False):
+        save_products_to_excel_streaming(products.iter_sorted(), products.columns)
+        return
+
+    import pandas as pd
+
+    # Check for column existence and rename
+    df = pd.DataFrame(list(products))
+
+    # Lists (e.g. image URLs) can't be written to cells as they are
+    for col in df.columns:
+        if df[col].map(lambda value: isinstance(value, list)).any():
+            df[col] = df[col].map(lambda value: "\n".join(map(str, value)) if isinstance(value, list) else value)
+
+    for col in df.columns:
+        if col in EXCEL_COLUMN_MAPPING:
+            df.rename(columns={col: EXCEL_COLUMN_MAPPING[col][0]}, inplace=True)
+
+    # Save the DataFrame to an Excel file
+    file_path = "products.xlsx"
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+    writer = pd.ExcelWriter(file_path, engine='xlsxwriter')
+    df.to_excel(writer, index=False, sheet_name='Sheet1')
+
+    # Set column widths and format
+    workbook = writer.book
+    worksheet = writer.sheets['Sheet1']
+    # Prices are written as numbers, shown with two decimals
+    price_format = workbook.add_format({'num_format': '0.00'})
+    for col, (header, width) in EXCEL_COLUMN_MAPPING.items():
+        if header in df.columns:
+            col_idx = df.columns.get_loc(header)
+            worksheet.set_column(col_idx, col_idx, width, price_format if col in ("price", "old_price") else None)
+
+    if "Is in stock" in df.columns:
+        _add_stock_formats(workbook, worksheet, df.columns.get_loc("Is in stock"), len(df))
+
+    writer.close()
+
+
+def product_key(product: dict) -> str:
+    """Key identifying a product (or its volume variant) between runs
+    Args:
+        product (dict): The product details
+    Returns:
+        str: Product URL, or brand and name if URL is unknown, followed by volume
+            and by SKU if known (variants from structured data can differ only by SKU)
+    """
+    identity = product.get("url") or f"{product.get('brand', '')}|{product.get('name', '')}"
+    key = f"{identity}|{product.get('volume_or_pcs') or ''}"
+    if product.get("sku"):
+        key += f"|{product['sku']}"
+    return key
+
+
+def get_snapshot_path(site: str, kind: str) -> str:
+    """Path of a new snapshot file. Names sort chronologically
+    Args:
+        site (str): Name of the site
+        kind (str): "full" for crawls with product pages, "sweep" for listing-only crawls
+    """
+    return os.path.join(SNAPSHOTS_DIR, f"{site}-{kind}-{datetime.now().strftime('%Y-%m-%d-%H%M%S')}.jsonl")
+
+
+def list_snapshots(site: str, kind: str = None) -> list:
+    """Paths of snapshots of the site from the oldest to the newest
+    Args:
+        site (str): Name of the site
+        kind (str): "full" or "sweep", snapshots of both kinds if not provided
+    """
+    paths = glob.glob(os.path.join(SNAPSHOTS_DIR, f"{site}-{kind or '*'}-*.jsonl"))
+    # File names end with "<YYYY-mm-dd-HHMMSS>.jsonl"
+    return sorted(paths, key=lambda path: os.path.basename(path)[-23:-6])
+
+
+def latest_snapshot_path(site: str, kind: str) -> str:
+    """Path of the most recent snapshot of the site or None if there is none"""
+    paths = list_snapshots(site, kind)
+    return paths[-1] if paths else None
+
+
+def save_snapshot(products, site: str, kind: str) -> str:
+    """Save products as JSON lines sorted by product key, for later runs to merge and compare with.
+    Only the first record of every product key is kept
+    Args:
+        products (list | data.spill.SpillBuffer): The product details, a spill buffer is merged from its sorted chunks
+        site (str): Name of the site
+        kind (str): "full" or "sweep"
+    Returns:
+        str: Path of the written snapshot
+    """
+    os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+    file_path = get_snapshot_path(site, kind)
+    iter_sorted = getattr(products, "iter_sorted", None)
+    sorted_products = iter_sorted() if iter_sorted is not None else sorted(products, key=product_key)
+    with open(file_path, "w", encoding="utf-8") as file:
+        previous_key = None
+        for product in sorted_products:
+            # A product listed at several catalog positions is stored once per key
+            key = product_key(product)
+            if key == previous_key:
+                continue
+            previous_key = key
+            file.write(json.dumps(product, ensure_ascii=False) + "\n")
+    return file_path
+
+
+def load_snapshot(file_path: str):
+    """Read products from a snapshot one by one
+    Args:
+        file_path (str): Path of the snapshot
+    Yields:
+        dict: The product details
+    """
+    with open(file_path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def index_snapshot_by_url(snapshot_path: str) -> dict:
+    """Offsets of snapshot records per product URL, so records can be read on demand
+    Args:
+        snapshot_path (str): Path of the snapshot
+    Returns:
+        dict: Lists of byte offsets keyed by URL
+    """
+    index = {}
+    with open(snapshot_path, "rb") as file:
+        offset = file.tell()
+        for line in iter(file.readline, b""):
+            if line.strip():
+                url = json.loads(line).get("url")
+                if url:
+                    index.setdefault(url, []).append(offset)
+            offset = file.tell()
+    return index
+
+
+def merge_with_snapshot(listing_products, snapshot_path: str):
+    """Merge fresh catalog listing details with product page details of the last full crawl.
+    Listing fields (price, stock, ...) come from the fresh listing. Products without a numeric price
+    in the listing (e.g. "MULTIPLE_VALUES" for several volumes) keep their variant records from the snapshot.
+    Every URL is emitted once, even if the listing shows it several times.
+    Only URLs and file offsets of the snapshot are kept in memory.
+    Args:
+        listing_products: Iterable of details scraped from catalog listing pages only
+        snapshot_path (str): Path of the full crawl snapshot, can be None
+    Yields:
+        dict: The merged product details
+    """
+    index = index_snapshot_by_url(snapshot_path) if snapshot_path else {}
+    snapshot_file = open(snapshot_path, "rb") if index else None
+    # A product can be listed at several catalog positions, its records are emitted only once
+    seen_urls = set()
+    try:
+        for listing_product in listing_products:
+            url = listing_product.get("url")
+            if url:
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+            offsets = index.get(url) if url else None
+            if not offsets:
+                yield listing_product
+                continue
+
+            # The snapshot can hold the same variant several times, keep one record per product key
+            previous_records = {}
+            for offset in offsets:
+                snapshot_file.seek(offset)
+                record = json.loads(snapshot_file.readline())
+                previous_records.setdefault(product_key(record), record)
+            previous_records = list(previous_records.values())
+
+            if parse_price(listing_product.get("price"))[0] is None:
+                # Variant prices ("MULTIPLE_VALUES") aren't shown in the listing, keep them from the last full crawl
+                fresh = {key: value for key, value in listing_product.items() if key not in VARIANT_FIELDS}
+                if listing_product.get("price_note") != "MULTIPLE_VALUES":
+                    # Price text like "not available" still tells the current stock status
+                    fresh.update({key: listing_product[key] for key in ("price_note", "in_stock") if key in listing_product})
+                for record in previous_records:
+                    yield {**record, **fresh}
+                continue
+
+            # Drop listing fields of the old record, so e.g. an expired discount doesn't survive
+            details = {key: value for key, value in previous_records[0].items() if key not in LISTING_FIELDS}
+            yield {**details, **listing_product}
+    finally:
+        if snapshot_file is not None:
+            snapshot_file.close()
+
+
+# Available sinks, loaded on demand by utils.helpers.import_object
+SINKS = {
+    "xlsx": "data.storage:save_products_to_excel",
+}
@@ -1,14 +1,22 @@
 import os
+import copy
+import json
+import queue
+import atexit
 import logging
 import logging.config
+import logging.handlers
+import threading
 from datetime import datetime
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
 LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "default": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            "format": LOG_FORMAT,
         },
     },
     "handlers": {
@@ -18,7 +26,8 @@ LOGGING_CONFIG = {
         },
         "file": {
             "class": "logging.FileHandler",
-            "filename": f"logs/{datetime.now().strftime('%Y-%m-%d')}.log",
+            # Filled in by configure_logging() with the date of the run
+            "filename": None,
             "formatter": "default",
         },
     },
@@ -30,16 +39,176 @@ LOGGING_CONFIG = {
     },
 }
 
+# State of the queue based logging mode and message sampling, see configure_logging()
+_queue_handler = None
+_queue_listener = None
+_sampler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format log records as single line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RepeatedMessageSampler(logging.Filter):
+    """Pass only the first occurrences of every repeated warning or error.
+    Messages are grouped by logger and message template (e.g. "Failed to extract brand for product: %s"),
+    so per product extraction misses are sampled, and the rest is only counted and
+    reported as a summary at the end of the run.
+    Attributes:
+        limit (int): Number of records passed per template
+        counts (dict): Number of records seen per (logger name, template)
+    """
+
+    def __init__(self, limit: int = 20):
+        super().__init__()
+        self.limit = limit
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING or record.levelno >= logging.CRITICAL:
+            return True
+        key = (record.name, str(record.msg))
+        with self._lock:
+            count = self.counts[key] = self.counts.get(key, 0) + 1
+        return count <= self.limit
+
+    def suppressed(self) -> dict:
+        """Get number of suppressed records per (logger name, template)"""
+        with self._lock:
+            return {key: count - self.limit for key, count in self.counts.items() if count > self.limit}
+
+
+class RecordQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving formatting to the handlers of the listener thread.
+    QueueHandler.prepare() formats the record and folds its traceback into the message, so
+    formatters behind the queue (e.g. JsonFormatter) would never see exc_info"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # Arguments are merged now, they might not be safe to format later in another thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class BatchWriteHandler(logging.handlers.MemoryHandler):
+    """Memory handler writing a whole batch of records to its stream handler target at once,
+    with a single write and flush instead of one per record"""
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.target is None or not self.buffer:
+                return
+            target = self.target
+            target.acquire()
+            try:
+                if target.stream is None:
+                    # File handlers created with delay=True open the file on first use
+                    target.stream = target._open()
+                lines = []
+                for record in self.buffer:
+                    if record.levelno >= target.level and target.filter(record):
+                        try:
+                            lines.append(target.format(record) + target.terminator)
+                        except Exception:
+                            target.handleError(record)
+                target.stream.write("".join(lines))
+                target.stream.flush()
+            finally:
+                target.release()
+            self.buffer.clear()
+        finally:
+            self.release()
+
+
+def configure_logging(use_queue: bool = False, json_format: bool = False,
+                      batch_size: int = 100, sample_limit: int = None):
+    """Configure root logger to write to the daily log file.
+    Nothing is configured at import time, entry points call this function explicitly.
+    Args:
+        use_queue (bool): Hand records over to a background thread through a queue
+            instead of writing them synchronously in the scraping thread
+        json_format (bool): Write records as JSON lines
+        batch_size (int): Number of records written to the file at once in queue mode.
+            Errors are written immediately
+        sample_limit (int): Pass only this many warnings/errors per message template, None to log all
+    Returns:
+        logging.Logger: Logger of this module
+    """
+    global _queue_handler, _queue_listener, _sampler
 
-def configure_logging():
     if not os.path.exists("logs"):
         os.makedirs("logs")
-    logging.config.dictConfig(LOGGING_CONFIG)
+    shutdown_logging()
+    config = copy.deepcopy(LOGGING_CONFIG)
+    config["handlers"]["file"]["filename"] = f"logs/{datetime.now().strftime('%Y-%m-%d')}.log"
+    logging.config.dictConfig(config)
+
+    root = logging.getLogger()
+    if json_format:
+        for handler in root.handlers:
+            handler.setFormatter(JsonFormatter())
+
+    if use_queue:
+        # Move file handler behind a queue, records are written in batches by the listener thread
+        file_handlers = list(root.handlers)
+        for handler in file_handlers:
+            root.removeHandler(handler)
+        batched_handlers = [
+            BatchWriteHandler(batch_size, flushLevel=logging.ERROR, target=handler)
+            for handler in file_handlers
+        ]
+        log_queue = queue.SimpleQueue()
+        _queue_handler = RecordQueueHandler(log_queue)
+        root.addHandler(_queue_handler)
+        _queue_listener = logging.handlers.QueueListener(log_queue, *batched_handlers, respect_handler_level=True)
+        _queue_listener.start()
+        atexit.register(shutdown_logging)
+
+    if sample_limit is not None:
+        _sampler = RepeatedMessageSampler(sample_limit)
+        # Filtering on the root handlers drops suppressed records before they are formatted or queued
+        for handler in root.handlers:
+            handler.addFilter(_sampler)
+
     logger = logging.getLogger(__name__)
     return logger
 
 
-logger = configure_logging()
+def shutdown_logging():
+    """Report sampled messages, stop the queue listener and flush all pending records"""
+    global _queue_handler, _queue_listener, _sampler
+
+    if _sampler is not None:
+        sampler, _sampler = _sampler, None
+        for handler in logging.getLogger().handlers:
+            handler.removeFilter(sampler)
+        for (name, template), count in sampler.suppressed().items():
+            logging.getLogger(name).warning("Suppressed %d more messages like: %s", count, template)
+
+    if _queue_listener is not None:
+        listener, _queue_listener = _queue_listener, None
+        listener.stop()
+        # Records logged after shutdown are written synchronously again
+        root = logging.getLogger()
+        root.removeHandler(_queue_handler)
+        _queue_handler = None
+        for handler in listener.handlers:
+            handler.flush()
+            root.addHandler(handler.target)
 
 
 def get_logger(name: str):
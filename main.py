@@ -1,103 +1,125 @@
-import pandas as pd
-from scraper.douglas_product_scraper import DouglasProductListScraper
-import os
-import xlsxwriter
 import argparse
+import os
+from contextlib import ExitStack
+
+from scraper import SITES, get_list_scraper_class
+from data.storage import SINKS, save_snapshot, list_snapshots, latest_snapshot_path, merge_with_snapshot
+from data.spill import SpillBuffer
+from utils.helpers import import_object
+from utils.metrics import metrics
+from logger_config import configure_logging, shutdown_logging
+
+# Share of --memory-budget for remembered product pages (deduplication), the rest is for scraped products
+DETAILS_CACHE_SHARE = 0.25
 
 def scrape_douglas_products(amount_of_pages):
     """Scrape Douglas product list and save to Excel file"""
     # Initialize the scraper
-    scraper = DouglasProductListScraper("https://www.douglas.lv/lv/katalogs/")
-
-    return scraper.scrape_product_list(amount_of_pages)
-
-def convert_price(value):
-    try:
-        return f"{float(value):.2f}"
-    except ValueError:
-        return value
-
-def save_products_to_excel(products):
-    """Save a list of products to an Excel file"""
-    # Define the column mapping and order
-    column_mapping = {
-        "brand": ("Brand", 30),
-        "name": ("Product name", 35),
-        "price": ("Price (EUR)", 10),
-        "type": ("Type", 10),
-        "volume_or_pcs": ("Product volume or pcs", 15),
-        "in_stock": ("Is in stock", 10),
-        "tag_name": ("Tag name", 25),
-        "tag_list": ("Tags", 30),
-        "about": ("About", 50)
-    }
-
-    # Check for column existence and rename
-    df = pd.DataFrame(products)
-
-    # Convert the price to float where applicable
-    if 'price' in df.columns:
-        df['price'] = df['price'].apply(convert_price)
-
-    for col in df.columns:
-        if col in column_mapping:
-            df.rename(columns={col: column_mapping[col][0]}, inplace=True)
-
-    # Save the DataFrame to an Excel file
-    file_path = "products.xlsx"
-    if os.path.exists(file_path):
-        os.remove(file_path)
-
-    writer = pd.ExcelWriter(file_path, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Sheet1')
-
-    # Set column widths and format
-    workbook = writer.book
-    worksheet = writer.sheets['Sheet1']
-    for col, (header, width) in column_mapping.items():
-        if header in df.columns:
-            col_idx = df.columns.get_loc(header)
-            worksheet.set_column(col_idx, col_idx, width)
-
-    # Apply conditional formatting for "Is in stock" column
-    if "Is in stock" in df.columns:
-        col_idx = df.columns.get_loc("Is in stock")
-        worksheet.conditional_format(1, col_idx, len(df), col_idx, {
-            'type': 'cell',
-            'criteria': '==',
-            'value': True,
-            'format': workbook.add_format({'bg_color': 'green'})
-        })
-        worksheet.conditional_format(1, col_idx, len(df), col_idx, {
-            'type': 'cell',
-            'criteria': '==',
-            'value': False,
-            'format': workbook.add_format({'bg_color': 'red'})
-        })
-
-    writer.close()
+    scraper = get_list_scraper_class("douglas")(SITES["douglas"]["url"])
 
+    products = []
+    for _, _, page_products in scraper.crawl(amount_of_pages):
+        products.extend(page_products)
+    return products
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description="Scrape Douglas products and save to Excel file.")
     parser.add_argument('-p', '--pages', type=int, default=None, help="Number of pages to scrape. If not provided, scrape all pages.")
+    parser.add_argument('--mode', choices=["full", "sweep"], default="full", help="full: scrape catalog and every product page. sweep: scrape only catalog pages (price, stock) and merge them with the last full run.")
+    parser.add_argument('--images', action='store_true', help="Download product images to the images/ directory alongside the crawl.")
+    parser.add_argument('--thumbnail-size', type=int, default=None, help="Also make thumbnails fitting into a square of this size in pixels (requires Pillow).")
+    parser.add_argument('--diff', action='store_true', help="Report price, stock and assortment changes since the previous run to reports/.")
+    parser.add_argument('--memory-budget', type=float, default=None, help="Keep at most about this many MB of scraped products in memory, the rest is spilled to temporary files on disk.")
+    parser.add_argument('--stop-on-empty', action='store_true', help="Stop scraping as soon as a catalog page returns no products.")
+    parser.add_argument('--sink', choices=list(SINKS), default="xlsx", help="Output format of scraped products.")
+    parser.add_argument('--metrics-json', default=None, help="Write JSON summary of run performance metrics to the given file.")
+    parser.add_argument('--metrics-prom', default=None, help="Write run performance metrics in Prometheus text format to the given file.")
+    parser.add_argument('--async-logging', action='store_true', help="Write logs in batches from a background thread instead of the scraping thread.")
+    parser.add_argument('--log-json', action='store_true', help="Write logs as JSON lines.")
+    parser.add_argument('--log-sample-limit', type=int, default=None, help="Log only this many repeated warnings of each kind (e.g. missing product fields), the rest is summarized at the end.")
 
     args = parser.parse_args()
     amount_of_pages = args.pages
 
-    # Process the Douglas products
-    print("Getting amount of pages to scrape...")
-    scraper = DouglasProductListScraper("https://www.douglas.lv/lv/katalogs/")
-    if not amount_of_pages:
-        amount_of_pages = scraper.get_amount_of_pages()
-
-    for page_number in range(1, amount_of_pages + 1):
-        print(f"Scraping page {page_number} from {amount_of_pages}")
-        products = scraper.scrape_product_list(page_number)
-
-    print("Saving results to Excel file...")
-    save_products_to_excel(products)
+    configure_logging(use_queue=args.async_logging, json_format=args.log_json, sample_limit=args.log_sample_limit)
+
+    # Process the Douglas products. Amount of pages is discovered from the first page itself
+    # With a memory budget details of product pages are remembered only for recently seen products
+    details_cache_mb = products_mb = None
+    if args.memory_budget:
+        details_cache_mb = args.memory_budget * DETAILS_CACHE_SHARE
+        products_mb = args.memory_budget - details_cache_mb
+    scraper = get_list_scraper_class("douglas")(SITES["douglas"]["url"], details_cache_mb)
+
+    listing_only = args.mode == "sweep"
+    image_pipeline = None
+    if args.images:
+        from data.images import ImagePipeline
+        image_pipeline = ImagePipeline(thumbnail_size=args.thumbnail_size)
+
+    # Spilled records are deleted when the run ends, also if it fails
+    with ExitStack() as stack:
+        products = stack.enter_context(SpillBuffer(products_mb))
+        for page_number, total_pages, page_products in scraper.crawl(amount_of_pages, stop_on_empty=args.stop_on_empty, listing_only=listing_only):
+            print(f"Scraped page {page_number} from {total_pages}")
+            products.extend(page_products)
+            if image_pipeline is not None:
+                # Images are downloaded in background while the next pages are scraped
+                for product in page_products:
+                    image_pipeline.submit(product)
+
+        if listing_only:
+            # Product page details (description, tags, ...) come from the last full run
+            full_snapshot_path = latest_snapshot_path("douglas", "full")
+            if full_snapshot_path is None:
+                print("No full run found, saving catalog details only")
+            if products.memory_budget is not None:
+                # Only one of the buffers may hold its budget in memory, the listing is read back from disk
+                products.spill()
+            merged_products = stack.enter_context(SpillBuffer(products_mb))
+            for product in merge_with_snapshot(products, full_snapshot_path):
+                merged_products.append(product)
+                if image_pipeline is not None:
+                    image_pipeline.submit(product)
+            products.close()  # Spilled listing records aren't needed anymore
+            products = merged_products
+
+        if image_pipeline is not None:
+            print("Waiting for image downloads...")
+            image_pipeline.finish()
+            image_pipeline.attach(products)
+        snapshot_path = save_snapshot(products, "douglas", args.mode)
+
+        if args.diff:
+            snapshots = list_snapshots("douglas")
+            if len(snapshots) < 2:
+                print("No previous run to compare with")
+            else:
+                from data.diff import diff_snapshots
+
+                report_name = os.path.splitext(os.path.basename(snapshot_path))[0]
+                with metrics.timer("sink_seconds", sink="diff"):
+                    counts = diff_snapshots(
+                        snapshots[-2], snapshot_path,
+                        os.path.join("reports", f"changes-{report_name}.jsonl"),
+                        os.path.join("reports", f"changes-{report_name}.xlsx"),
+                    )
+                print(f"Changes since the previous run: {counts}")
+
+        print("Saving results...")
+        save_products = import_object(SINKS[args.sink])
+        with metrics.timer("sink_seconds", sink=args.sink):
+            save_products(products)
+
+    summary = metrics.summary()
+    print(f"Finished in {summary['elapsed_seconds']} s, throughput: {summary['throughput']}")
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+
+    shutdown_logging()
 
 
 if __name__ == "__main__":
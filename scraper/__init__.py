@@ -0,0 +1,25 @@
+"""Registry of supported sites. Scraper modules are imported lazily,
+so e.g. running Douglas doesn't load selenium needed by Notino."""
+
+from utils.helpers import import_object
+
+SITES = {
+    "douglas": {
+        "url": "https://www.douglas.lv/lv/katalogs/",
+        "list_scraper": "scraper.douglas_product_scraper:DouglasProductListScraper",
+    },
+    "notino": {
+        "url": "https://www.notino.lv",
+        "list_scraper": "scraper.notino_product_scraper:NotinoProductListScraper",
+    },
+}
+
+
+def get_list_scraper_class(site: str):
+    """Import and return the list scraper class of a site
+    Args:
+        site (str): Name of the site, one of SITES
+    Returns:
+        type: The list scraper class
+    """
+    return import_object(SITES[site]["list_scraper"])
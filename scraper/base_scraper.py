@@ -7,17 +7,130 @@ that require the child classes to implement specific methods
 for extracting data (e.g., extract_product_details())."""
 
 from abc import ABC, abstractmethod
-from time import sleep
+from time import sleep, perf_counter
 from random import randint
 
 import requests
-from requests.exceptions import HTTPError
+from requests.exceptions import HTTPError, RequestException
 
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
 
 from scraper.exceptions import ScraperError
 
+from utils.metrics import metrics
+
+# Shared user agent generator, created on first use as loading its data is slow
+_user_agent_generator = None
+
+# Range of random pause between requests in seconds, see throttle()
+THROTTLE_RANGE = (1, 3)
+
+# Attempts per request in fetch_with_retries() and status codes worth another attempt
+REQUEST_RETRIES = 3
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def random_user_agent() -> str:
+    """Generate a random user agent"""
+    global _user_agent_generator
+    if _user_agent_generator is None:
+        from fake_useragent import UserAgent
+        _user_agent_generator = UserAgent()
+    return _user_agent_generator.random
+
+
+def fetch(url: str, headers: dict, metric_prefix: str = "") -> requests.models.Response:
+    """Send a GET request and record its timings.
+    Connect and server time (until response headers arrive) and body download time
+    are measured separately.
+    Args:
+        url (str): The URL to send the request to
+        headers (dict): The headers to be used in the request
+        metric_prefix (str): Prefix of metric names, keeps other requests (e.g. "image_") apart
+            from page requests counted in throughput
+    Returns:
+        requests.models.Response: The response object with the body already downloaded
+    Raises:
+        HTTPError: If the response has an error status code
+    """
+    start = perf_counter()
+    response = requests.get(url, headers=headers, timeout=10, stream=True)
+    headers_received = perf_counter()
+    response.content  # Download the body now, so that it is measured separately
+    finished = perf_counter()
+
+    metrics.increment(f"{metric_prefix}requests_total", status=response.status_code)
+    if response.status_code == 429:
+        metrics.increment(f"{metric_prefix}http_429_total")
+    metrics.observe(f"{metric_prefix}http_connect_and_server_seconds", headers_received - start)
+    metrics.observe(f"{metric_prefix}http_download_seconds", finished - headers_received)
+    metrics.observe(f"{metric_prefix}http_request_seconds", finished - start)
+
+    response.raise_for_status()
+    return response
+
+
+def fetch_with_retries(url: str, headers: dict, retries: int = REQUEST_RETRIES,
+                       metric_prefix: str = "") -> requests.models.Response:
+    """Send a GET request with fetch(), retrying rate limited, server and connection errors.
+    The pause before each retry grows with the attempt number (THROTTLE_RANGE times the attempt)
+    Args:
+        url (str): The URL to send the request to
+        headers (dict): The headers to be used in the request
+        retries (int): Maximal number of attempts
+        metric_prefix (str): Prefix of metric names, see fetch()
+    Returns:
+        requests.models.Response: The response object
+    Raises:
+        HTTPError: If the response has a non-retryable error status code or the last attempt failed
+        RequestException: If the last attempt couldn't connect or timed out
+    """
+    for attempt in range(1, retries + 1):
+        try:
+            return fetch(url, headers, metric_prefix)
+        except HTTPError as e:
+            if e.response is None or e.response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                raise
+        except RequestException:
+            # Connection errors and timeouts
+            if attempt == retries:
+                raise
+        metrics.increment(f"{metric_prefix}retries_total", stage="request")
+        throttle(THROTTLE_RANGE[0] * attempt, THROTTLE_RANGE[1] * attempt)
+
+
+def parse(content: bytes) -> BeautifulSoup:
+    """Parse HTML content and record parsing time
+    Args:
+        content (bytes): The HTML content
+    Returns:
+        BeautifulSoup: The parsed HTML content
+    """
+    with metrics.timer("parse_seconds"):
+        return BeautifulSoup(content, "html.parser")
+
+
+def throttle(min_seconds: int = None, max_seconds: int = None):
+    """Sleep for a random amount of seconds to avoid 429 errors and record the time spent
+    Args:
+        min_seconds (int): Minimal sleep duration, THROTTLE_RANGE is used if not provided
+        max_seconds (int): Maximal sleep duration, THROTTLE_RANGE is used if not provided
+    """
+    min_seconds = THROTTLE_RANGE[0] if min_seconds is None else min_seconds
+    max_seconds = THROTTLE_RANGE[1] if max_seconds is None else max_seconds
+    with metrics.timer("throttle_seconds"):
+        sleep(randint(min_seconds, max_seconds))
+
+
+def set_throttle_range(min_seconds: int, max_seconds: int):
+    """Change the default pause between requests (e.g. disable it against a local server)
+    Args:
+        min_seconds (int): Minimal sleep duration
+        max_seconds (int): Maximal sleep duration
+    """
+    global THROTTLE_RANGE
+    THROTTLE_RANGE = (min_seconds, max_seconds)
+
 
 class BaseListScraper(ABC):
     """A base class for scraping product list page
@@ -29,6 +142,7 @@ class BaseListScraper(ABC):
     
     def __init__(self, url: str):
         self.base_url = url
+        self.url = url
         self.headers = {
             "User-Agent": self.user_agent
         }
@@ -36,7 +150,7 @@ class BaseListScraper(ABC):
     @property
     def user_agent(self) -> str:
         """Generate a random user agent"""
-        return UserAgent().random
+        return random_user_agent()
 
     def send_request(self, url: str) -> requests.models.Response:
         """Send a request to the given URL and return the response
@@ -48,10 +162,8 @@ class BaseListScraper(ABC):
             ScraperError: If the request fails
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response
-        except HTTPError as e:
+            return fetch_with_retries(url, self.headers)
+        except RequestException as e:
             raise ScraperError(f"Failed to send request: {e}")
 
     def parse_html(self, response: requests.models.Response) -> BeautifulSoup:
@@ -61,7 +173,7 @@ class BaseListScraper(ABC):
         Returns:
             BeautifulSoup: The parsed HTML content
         """
-        return BeautifulSoup(response.content, "html.parser")
+        return parse(response.content)
 
     @abstractmethod
     def extract_product_links(self, soup: BeautifulSoup) -> list:
@@ -90,12 +202,13 @@ class BaseListScraper(ABC):
         try:
             response = self.send_request(self.url)
             soup = self.parse_html(response)
-            return self.extract_product_links(soup)
+            with metrics.timer("extract_seconds", extractor="product_links"):
+                return self.extract_product_links(soup)
         except ScraperError as e:
             print(e)
             return []
         finally:
-            sleep(randint(1, 3))
+            throttle()
 
 
 class BaseScraper(ABC):
@@ -115,7 +228,7 @@ class BaseScraper(ABC):
     @property
     def user_agent(self) -> str:
         """Generate a random user agent"""
-        return UserAgent().random
+        return random_user_agent()
 
     def send_request(self, url: str) -> requests.models.Response:
         """Send a request to the given URL and return the response
@@ -127,10 +240,8 @@ class BaseScraper(ABC):
             ScraperError: If the request fails
         """
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            return response
-        except HTTPError as e:
+            return fetch_with_retries(url, self.headers)
+        except RequestException as e:
             raise ScraperError(f"Failed to send request: {e}")
 
     def parse_html(self, response: requests.models.Response) -> BeautifulSoup:
@@ -140,7 +251,7 @@ class BaseScraper(ABC):
         Returns:
             BeautifulSoup: The parsed HTML content
         """
-        return BeautifulSoup(response.content, "html.parser")
+        return parse(response.content)
 
     @abstractmethod
     def extract_product_details(self, soup: BeautifulSoup) -> dict:
@@ -159,11 +270,12 @@ class BaseScraper(ABC):
         try:
             response = self.send_request(self.url)
             soup = self.parse_html(response)
-            return self.extract_product_details(soup)
+            with metrics.timer("extract_seconds", extractor="product_details"):
+                return self.extract_product_details(soup)
         except ScraperError as e:
             print(e)
             return {}
         finally:
-            sleep(randint(1, 3))
+            throttle()
         
 
@@ -1,14 +1,19 @@
 """Scraper for Douglas product pages."""
 
-from random import randint
-from time import sleep
-
 from bs4 import BeautifulSoup
 import requests
 from requests.exceptions import HTTPError
 
-from scraper.base_scraper import BaseScraper, BaseListScraper
+from scraper.base_scraper import BaseScraper, BaseListScraper, throttle
 from scraper.exceptions import ScraperError
+from scraper.structured_data import (
+    extract_json_ld, find_product, extract_offer_variants, extract_structured_product, parse_volume
+)
+
+from data.dedupe import DetailsCache
+from data.normalize import normalize_record, normalize_records, parse_price
+from utils.helpers import canonicalize_url
+from utils.metrics import metrics
 
 from logger_config import get_logger
 
@@ -18,9 +23,11 @@ logger = get_logger(__name__)
 class DouglasProductListScraper(BaseListScraper):
     """A scraper for Douglas product list pages"""
 
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, details_cache_mb: float = None):
         logger.info("Initializing DouglasProductListScraper with base URL: %s", base_url)
         self.base_url = base_url
+        # Details of product pages scraped during this run, shared by all catalog pages
+        self.details_cache = DetailsCache(details_cache_mb)
         super().__init__(base_url)
 
     def get_amount_of_pages(self) -> int:
@@ -28,13 +35,20 @@ class DouglasProductListScraper(BaseListScraper):
         try:
             response = self.send_request(self.base_url)
             soup = self.parse_html(response)
-            amount_of_pages = soup.select_one("#products_listing > div.page_info.clearfix > div.paginator > a.page.last").text
-            return int(amount_of_pages)
+            return self.extract_amount_of_pages(soup)
         except HTTPError as e:
             logger.error("Failed to get amount of pages: %s", e)
         except Exception as e:
             logger.error("An error occurred: %s", e)
 
+    def extract_amount_of_pages(self, soup: BeautifulSoup) -> int:
+        """Extract the amount of pages from the paginator of an already parsed product list page.
+        Falls back to a single page if the paginator is missing (catalog fits on one page)"""
+        last_page_element = soup.select_one("#products_listing > div.page_info.clearfix > div.paginator > a.page.last")
+        if last_page_element is None:
+            return 1
+        return int(last_page_element.text.strip())
+
     def get_page_url(self, page_number: int) -> str:
         """Construct the URL for a specific page number"""
         return f"{self.base_url}?&page={page_number}"
@@ -56,36 +70,40 @@ class DouglasProductListScraper(BaseListScraper):
             for element in product_elements:
                 product_details = {}
 
+                # Product page URL identifies the product between runs
+                try:
+                    product_details["url"] = canonicalize_url(element.find("a")["href"])
+                except (TypeError, KeyError):
+                    pass
+
                 # Get name, brand, type with skipping if not available
                 # Get name
                 try:
                     product_details["name"] = element.select_one("span.product_info_block > span.name").find(text=True, recursive=False).strip()
                 except AttributeError:
                     logger.warning("Failed to extract name for product")
+                    metrics.increment("extraction_misses_total", field="name")
 
                 # Get brand
                 try:
                     product_details["brand"] = element.select_one("span.product_info_block > span.name > span.brand_caps").text.strip()
                 except AttributeError:
                     logger.warning("Failed to extract brand for product: %s", product_details.get("name", "N/A"))
+                    metrics.increment("extraction_misses_total", field="brand")
 
                 # Get type
                 try:
                     product_details["type"] = element.select_one("span.product_info_block > span.type").text.strip()
                 except AttributeError:
                     logger.warning("Failed to extract type for product: %s", product_details.get("name", "N/A"))
+                    metrics.increment("extraction_misses_total", field="type")
 
-                # Get price, in stock or mark as not available
+                # Get price text, it is parsed (and in stock status derived) for the whole page at once
                 try:
-                    price_text = element.select_one("span.product_info_block > span.price > span.now").text.strip()
-                    try:
-                        product_details["price"] = float(''.join(c for c in price_text if c.isdigit() or c == '.'))
-                        product_details["in_stock"] = True
-                    except ValueError:
-                        product_details["price"] = price_text
-                        product_details["in_stock"] = False
+                    product_details["price"] = element.select_one("span.product_info_block > span.price > span.now").text.strip()
                 except AttributeError:
                     logger.warning("Failed to extract price for product: %s", product_details["name"])
+                    metrics.increment("extraction_misses_total", field="price")
 
                 # Get volume or pcs in packing
                 try:
@@ -98,60 +116,181 @@ class DouglasProductListScraper(BaseListScraper):
                 try:
                     old_price_element = element.select_one("span.product_info_block > span.price > span.old_price")
                     if old_price_element:
-                        product_details["old_price"] = float(old_price_element.text.strip().replace("€", "").replace(",", "."))
+                        product_details["old_price"] = old_price_element.text.strip()
                 except AttributeError:
                     pass
 
                 general_product_details.append(product_details)
         except AttributeError:
             logger.warning("Failed to extract general product details")
-        return general_product_details
 
-    def scrape_product_list(self, page_number: int) -> list:
-        """Scrape the product list from a specific page number"""
+        # Prices, currencies, volumes and stock status are parsed from the raw texts
+        with metrics.timer("normalize_seconds"):
+            return normalize_records(general_product_details)
+
+    def scrape_product_list(self, page_number: int, listing_only: bool = False) -> list:
+        """Scrape the product list from a specific page number
+        Args:
+            page_number (int): The catalog page number
+            listing_only (bool): Return only details shown in the catalog, without visiting product pages
+        Returns:
+            list: A list of product details dictionaries
+        """
         page_url = self.get_page_url(page_number)
         logger.info("Scraping product list from page: %s", page_url)
         try:
             response = self.send_request(page_url)
-
             soup = self.parse_html(response)
+            if listing_only:
+                products = self.scrape_listing_from_soup(soup, page_url)
+            else:
+                products = self.scrape_products_from_soup(soup, page_url)
+            # Release the parsed tree right away, it's many times bigger than the page itself
+            soup.decompose()
+            return products
+        except HTTPError as e:
+            raise ScraperError(f"HTTP error occurred: {e}")
+        except Exception as e:
+            raise ScraperError(f"An error occurred: {e}")
+
+    def scrape_listing_from_soup(self, soup: BeautifulSoup, page_url: str) -> list:
+        """Get details shown in an already parsed catalog page (price, stock, name, brand, type, volume),
+        without visiting product pages
+        Args:
+            soup (BeautifulSoup): The parsed HTML content of the product list page
+            page_url (str): The URL of the product list page, used for logging
+        Returns:
+            list: A list of general product details dictionaries
+        """
+        with metrics.timer("extract_seconds", extractor="general_product_details"):
+            general_product_details = self.extract_general_product_details(soup)
+        logger.info("Extracted general product details from page: %s", page_url)
+
+        metrics.increment("pages_total")
+        metrics.increment("products_total", len(general_product_details))
+        return general_product_details
 
+    def scrape_products_from_soup(self, soup: BeautifulSoup, page_url: str) -> list:
+        """Scrape product pages for every product of an already parsed product list page
+        Args:
+            soup (BeautifulSoup): The parsed HTML content of the product list page
+            page_url (str): The URL of the product list page, used for logging
+        Returns:
+            list: A list of product details dictionaries
+        """
+        with metrics.timer("extract_seconds", extractor="product_links"):
             product_links = self.extract_product_links(soup)
 
+        with metrics.timer("extract_seconds", extractor="general_product_details"):
             general_product_details = self.extract_general_product_details(soup)
-            logger.info("Extracted general product details from page: %s", page_url)
-            products = []
-            for link in product_links:
-                sleep(randint(1, 3))  # Random sleep to avoid 429 error
+        logger.info("Extracted general product details from page: %s", page_url)
+        products = []
+        for index, link in enumerate(product_links):
+            # The same product can be listed in several positions, fetch its page only once per run
+            product_details = self.details_cache.get_by_url(link)
+            if product_details is not None:
+                logger.info("Reusing already scraped product %s", link)
+                metrics.increment("dedupe_hits_total", kind="url")
+                products.append(product_details)
+                continue
 
-                if "item" in link:
-                    logger.info("Scraping product %s", link)
-                else:
-                    logger.info("Scraping product %s", link)
+            throttle()  # Random sleep to avoid 429 error
 
-                has_multiple_prices = general_product_details[product_links.index(link)].get("price") == "MULTIPLE_VALUES"
+            logger.info("Scraping product %s", link)
 
-                product_scraper = DouglasProductScraper(link, has_multiple_prices)
-                product_details = product_scraper.scrape()
+            has_multiple_prices = general_product_details[index].get("price_note") == "MULTIPLE_VALUES"
 
-                products.append(product_details)
+            product_scraper = DouglasProductScraper(link, has_multiple_prices, self.details_cache)
+            product_details = product_scraper.scrape()
 
-            # Update the product details with the general product details
-            for i, product in enumerate(products):
-                product.update(general_product_details[i])
+            products.append(product_details)
 
-            return products
+        # Update the product details with the general product details
+        for i, product in enumerate(products):
+            product.update(general_product_details[i])
+
+        products = self.expand_variants(products)
+
+        metrics.increment("pages_total")
+        metrics.increment("products_total", len(products))
+        return products
+
+    def expand_variants(self, products: list) -> list:
+        """Emit products with several volumes as one record per volume/price variant
+        Args:
+            products (list): Product details, possibly with "variants" list
+        Returns:
+            list: Product details without "variants", variant values override general ones
+        """
+        records = []
+        for product in products:
+            variants = product.pop("variants", None)
+            if not variants:
+                records.append(product)
+                continue
+            product.pop("price_note", None)  # "MULTIPLE_VALUES" is replaced by variant prices
+            for variant in variants:
+                # Listing details are already normalised, only variant prices and volumes are new
+                records.append(normalize_record({**product, **variant}))
+        return records
+
+    def crawl(self, amount_of_pages: int = None, stop_on_empty: bool = False, listing_only: bool = False):
+        """Crawl the catalog page by page.
+        The first page is fetched only once: it yields both its products and the amount of pages,
+        so no separate request is needed to discover pagination.
+        Args:
+            amount_of_pages (int): Maximum number of pages to scrape. If not provided, scrape all pages
+            stop_on_empty (bool): Stop crawling as soon as a page returns no product elements
+            listing_only (bool): Walk only catalog pages and skip product pages ("price sweep")
+        Yields:
+            tuple: (page_number, total_pages, products) for every scraped page
+        Raises:
+            ScraperError: If a product list page can't be scraped
+        """
+        first_page_url = self.get_page_url(1)
+        logger.info("Scraping product list from page: %s", first_page_url)
+        try:
+            response = self.send_request(first_page_url)
+            soup = self.parse_html(response)
+            total_pages = self.extract_amount_of_pages(soup)
+            if amount_of_pages:
+                total_pages = min(total_pages, amount_of_pages)
+            logger.info("Discovered %d pages to scrape", total_pages)
+            if listing_only:
+                products = self.scrape_listing_from_soup(soup, first_page_url)
+            else:
+                products = self.scrape_products_from_soup(soup, first_page_url)
+            soup.decompose()
+            del soup, response
         except HTTPError as e:
             raise ScraperError(f"HTTP error occurred: {e}")
+        except ScraperError:
+            raise
         except Exception as e:
             raise ScraperError(f"An error occurred: {e}")
 
+        yield 1, total_pages, products
+        if stop_on_empty and not products:
+            logger.info("Page 1 returned no products, stopping")
+            return
+
+        # Remaining pages are known right away, schedule them without extra requests
+        for page_number in range(2, total_pages + 1):
+            if listing_only:
+                throttle()  # No product page requests in between, pause between catalog pages instead
+            products = self.scrape_product_list(page_number, listing_only)
+            yield page_number, total_pages, products
+            if stop_on_empty and not products:
+                logger.info("Page %d returned no products, stopping", page_number)
+                return
+
 
 class DouglasProductScraper(BaseScraper):
     """A scraper for Douglas product page"""
 
-    def __init__(self, url: str, has_multiple_prices: bool = False):
+    def __init__(self, url: str, has_multiple_prices: bool = False, details_cache: DetailsCache = None):
         self.has_multiple_prices = has_multiple_prices
+        self.details_cache = details_cache
         super().__init__(url)
 
     def extract_product_details(self, soup: BeautifulSoup) -> dict:
@@ -161,34 +300,89 @@ class DouglasProductScraper(BaseScraper):
         Returns:
             dict: A dictionary containing the product details
         """
-        product_details = {}
-        
+        # Fast path: read everything available from JSON-LD / embedded state, selectors are only a fallback
+        structured_details, structured_product = extract_structured_product(soup, self.url)
+        product_details = {
+            key: value for key, value in structured_details.items()
+            if key in ("name", "brand", "price", "currency", "in_stock", "image_urls", "sku")
+        }
+        if "description" in structured_details:
+            product_details["about"] = structured_details["description"]
+
+        # Page preview image is the main product photo when structured data has no images
+        if "image_urls" not in product_details:
+            image_element = soup.find("meta", property="og:image")
+            if image_element and image_element.get("content"):
+                product_details["image_urls"] = [image_element["content"]]
+
         # Update with tag_name
         try:
             product_details["tag_name"] = soup.select_one("#product_info1 > div.short_description > div:nth-child(1) > span.k").text.strip()
         except AttributeError:
             logger.warning("Failed to extract tag name for product: %s", self.url)
+            metrics.increment("extraction_misses_total", field="tag_name")
 
         # Update with gender
         try:
             product_details["gender"] = soup.select_one("#product_info1 > div.short_description > div:nth-child(2) > span.v").text.strip()
         except AttributeError:
             logger.warning("Failed to extract gender for product: %s", self.url)
+            metrics.increment("extraction_misses_total", field="gender")
 
         # Update with about
-        try:
-            product_details["about"] = soup.select_one("#tab_about > div > div > div > p:nth-child(4)").text.strip()
-        except AttributeError:
-            logger.warning("Failed to extract about for product: %s", self.url)
+        if "about" not in product_details:
+            try:
+                product_details["about"] = soup.select_one("#tab_about > div > div > div > p:nth-child(4)").text.strip()
+            except AttributeError:
+                logger.warning("Failed to extract about for product: %s", self.url)
+                metrics.increment("extraction_misses_total", field="about")
 
         # Update with tag_list
         try:
             product_details["tag_list"] = soup.select_one("#product_info1 > div.short_description > div:nth-child(1) > span.v ").text.strip()
         except AttributeError:
             logger.warning("Failed to extract tag list for product: %s", self.url)
-        
+            metrics.increment("extraction_misses_total", field="tag_list")
+
+        # Listing shows "MULTIPLE_VALUES" instead of price, read every volume/price variant from this page
+        if self.has_multiple_prices:
+            variants = self.extract_variants(soup, structured_product)
+            if variants:
+                product_details["variants"] = variants
+            else:
+                logger.warning("Failed to extract variants for product: %s", self.url)
+                metrics.increment("extraction_misses_total", field="variants")
+
         return product_details
 
+    def extract_variants(self, soup: BeautifulSoup, product: dict = None) -> list:
+        """Extract volume/price variants from data embedded in the product page, without requests per variant.
+        JSON-LD offers are used first, variant selector elements with price data attributes are the fallback.
+        Args:
+            soup (BeautifulSoup): The parsed HTML content
+            product (dict): Already extracted structured product object, read from the page if not provided
+        Returns:
+            list: A list of dictionaries with volume_or_pcs, price and in_stock
+        """
+        variants = []
+        if product is None:
+            product = find_product(extract_json_ld(soup))
+        if product is not None:
+            variants = extract_offer_variants(product)
+
+        if not variants:
+            for element in soup.select("#product_info1 [data-price]"):
+                price, _ = parse_price(element["data-price"])
+                if price is None:
+                    continue
+                volume = element.get("data-volume") or element.get("title") or element.get_text(" ", strip=True)
+                variants.append({"volume_or_pcs": parse_volume(volume), "price": price})
+
+        for variant in variants:
+            # Variant with a price can be bought, same as in the listing
+            variant.setdefault("in_stock", True)
+        return variants
+
     def scrape(self) -> dict:
         """Scrape the product details from the product web page
         Returns:
@@ -196,8 +390,22 @@ class DouglasProductScraper(BaseScraper):
         """
         try:
             response = self.send_request(self.url)
+
+            # Identical page body was already parsed under another URL, skip parsing
+            if self.details_cache is not None:
+                product_details = self.details_cache.get_by_content(response.content)
+                if product_details is not None:
+                    metrics.increment("dedupe_hits_total", kind="content")
+                    self.details_cache.add(self.url, product_details)
+                    return product_details
+
             soup = self.parse_html(response)
-            product_details = self.extract_product_details(soup)
+            with metrics.timer("extract_seconds", extractor="product_details"):
+                product_details = self.extract_product_details(soup)
+            soup.decompose()
+
+            if self.details_cache is not None:
+                self.details_cache.add(self.url, product_details, response.content)
             return product_details
         except ScraperError as e:
             raise ScraperError(f"Failed to scrape product details: {e}")
@@ -3,18 +3,17 @@ which can be called from any scraper."""
 
 from time import sleep
 from random import randint
-import logging
-
 from bs4 import BeautifulSoup
 
 import requests
-from requests.exceptions import HTTPError
+from requests.exceptions import RequestException
 
+from scraper.base_scraper import fetch_with_retries
 from scraper.exceptions import ScraperError
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from logger_config import get_logger
+
+logger = get_logger(__name__)
 
 def log_error(error: str):
     """Log an error message
@@ -24,7 +23,7 @@ def log_error(error: str):
     logger.error(error)
 
 def handle_request_error(url: str, headers: dict) -> requests.models.Response:
-    """Handle a failed request by retrying with a delay
+    """Handle a failed request by retrying with a delay, see base_scraper.fetch_with_retries()
     Args:
         url (str): The URL to send the request to
         headers (dict): The headers to be used in the request
@@ -33,19 +32,11 @@ def handle_request_error(url: str, headers: dict) -> requests.models.Response:
     Raises:
         ScraperError: If the request fails after multiple retries
     """
-    retries = 3
-    for i in range(retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response
-        except HTTPError as e:
-            log_error(f"Failed to send request: {e}")
-            if i < retries - 1:
-                delay = randint(1, 5)
-                log_error(f"Retrying in {delay} seconds...")
-                sleep(delay)
-    raise ScraperError("Failed to send request after multiple retries")
+    try:
+        return fetch_with_retries(url, headers)
+    except RequestException as e:
+        log_error(f"Failed to send request: {e}")
+        raise ScraperError("Failed to send request after multiple retries")
 
 def handle_parse_error(response: requests.models.Response) -> BeautifulSoup:
     """Handle a failed parse operation by retrying with a delay
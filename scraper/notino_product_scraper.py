@@ -1,24 +1,23 @@
 """Scraper for Notino products. 
 Contains scraper of brands catalog site, specific brand paginated site and product page."""
 
-from random import randint
+import time
+from typing import TYPE_CHECKING
 
 from bs4 import BeautifulSoup
-import requests
 from requests.exceptions import HTTPError
 
-import time
+from scraper.base_scraper import BaseScraper, BaseListScraper, throttle
+from scraper.exceptions import ScraperError
+from scraper.structured_data import extract_structured_product
 
-from selenium import webdriver
-from selenium.webdriver.firefox.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from data.normalize import normalize_records
 
-from scraper.base_scraper import BaseScraper, BaseListScraper
-from scraper.exceptions import ScraperError
+from utils.metrics import metrics
 
-from utils.webdriver import WebDriver
+if TYPE_CHECKING:
+    # Selenium is imported only when products are actually loaded with the browser
+    from utils.webdriver import WebDriver
 
 from logger_config import get_logger
 
@@ -28,7 +27,7 @@ logger = get_logger(__name__)
 class NotinoProductListScraper(BaseListScraper):
     """A scraper for Notino brands catalog pages"""
 
-    def __init__(self, base_url: str, driver: WebDriver):
+    def __init__(self, base_url: str, driver: "WebDriver"):
         logger.info("Initializing NotinoBrandsCatalogScraper with base URL: %s", base_url)
         self.base_url = base_url
         self.web_driver = driver
@@ -38,7 +37,7 @@ class NotinoProductListScraper(BaseListScraper):
     def get_brands(self) -> list:
         """Get the brands from the brands catalog page"""
         try:
-            time.sleep(randint(1, 3))
+            throttle()
             response = self.send_request(self.base_url)
             soup = self.parse_html(response)
             brands, links = self.extract_brands(soup)
@@ -79,6 +78,8 @@ class NotinoProductListScraper(BaseListScraper):
 
     def load_all_products_for_brand(self, brand: str):
         """Load all products for a brand by clicking the 'Show more' button until it no longer exists"""
+        from selenium.webdriver.common.by import By
+
         url = self.get_brand_url(brand)
         self.web_driver.get(url)
 
@@ -130,6 +131,7 @@ class NotinoProductListScraper(BaseListScraper):
                     product_details["name"] = element.select_one("a > div:nth-child(3) > h2").text.strip()
                 except AttributeError:
                     logger.error("No product name found for product %s", element.select_one("a")["href"])
+                    metrics.increment("extraction_misses_total", field="name")
                     continue
 
                 # Get brand
@@ -137,6 +139,7 @@ class NotinoProductListScraper(BaseListScraper):
                     product_details["brand"] = element.select_one("a > div:nth-child(3) > h3").text.strip()
                 except AttributeError:
                     logger.error("No brand found for product %s", element.select_one("a")["href"])
+                    metrics.increment("extraction_misses_total", field="brand")
                     continue
 
                 # Get description
@@ -144,12 +147,12 @@ class NotinoProductListScraper(BaseListScraper):
                     product_details["description"] = element.select_one("a > div:nth-child(3) > p").text.strip()
                 except AttributeError:
                     logger.error("No description found for product %s", element.select_one("a")["href"])
+                    metrics.increment("extraction_misses_total", field="description")
                     continue
 
                 # Get price
                 try:
-                    price_text = element.select_one("a > div:nth-child(3) > div.product-price > div > div > span[data-testid='price-component']").text.strip()
-                    product_details["price"] = float(''.join(c for c in price_text if c.isdigit() or c == '.'))
+                    product_details["price"] = element.select_one("a > div:nth-child(3) > div.product-price > div > div > span[data-testid='price-component']").text.strip()
                 except AttributeError:
                     # If price is not available, warning message is contained in the warning-text div instead of product-price div
                     try:
@@ -157,34 +160,52 @@ class NotinoProductListScraper(BaseListScraper):
                         product_details["price"] = price_text
                     except AttributeError:
                         logger.error("No price found for product %s", element.select_one("a")["href"])
+                        metrics.increment("extraction_misses_total", field="price")
                         continue
                 
                 general_product_details.append(product_details)
         except Exception as e:
             logger.error("An error occurred: %s", e)
-        return general_product_details
+
+        # Price texts (or "not available" warnings) are parsed to prices and stock status
+        with metrics.timer("normalize_seconds"):
+            return normalize_records(general_product_details)
     
     def extract_product_details(self, soup: BeautifulSoup) -> dict:
-        """Extract product details from the HTML content of the product page"""
+        """Extract product details from the HTML content of the product page.
+        JSON-LD / embedded state is read first, selectors are only used for fields it doesn't provide"""
         product_details = {}
         try:
+            structured_details, _ = extract_structured_product(soup)
+            product_details = {
+                key: value for key, value in structured_details.items()
+                if key in ("name", "brand", "description", "price", "currency", "in_stock", "image_urls", "sku")
+            }
+            if "category" in structured_details:
+                product_details["type"] = structured_details["category"]
+
             # Get description
-            try:
-                product_details["description"] = soup.select_one("div[data-testid='pd-description-text'] > p.nth-child(1)").text.strip()
-            except AttributeError:
-                logger.error("No description found for product %s", self.url)
+            if "description" not in product_details:
+                try:
+                    product_details["description"] = soup.select_one("div[data-testid='pd-description-text'] > p.nth-child(1)").text.strip()
+                except AttributeError:
+                    logger.error("No description found for product %s", self.url)
+                    metrics.increment("extraction_misses_total", field="description")
 
             # Get category
-            try:
-                product_details["type"] = soup.select_one("div[data-testid='brandcrumb-wrapper'] > div > a:nth-last-child(3)").text.strip()
-            except AttributeError:
-                logger.error("No category found for product %s", self.url)
+            if "type" not in product_details:
+                try:
+                    product_details["type"] = soup.select_one("div[data-testid='brandcrumb-wrapper'] > div > a:nth-last-child(3)").text.strip()
+                except AttributeError:
+                    logger.error("No category found for product %s", self.url)
+                    metrics.increment("extraction_misses_total", field="type")
 
             # Get volume
             try:
                 product_details["volume"] = soup.select_one("div[aria-live='assertive'] > div:nth-child(1) > span").text.strip()
             except AttributeError:
                 logger.error("No volume found for product %s", self.url)
+                metrics.increment("extraction_misses_total", field="volume")
 
             # Get price before discount if available
             try:
@@ -200,9 +221,13 @@ class NotinoProductListScraper(BaseListScraper):
     def scrape_products_for_brand(self, brand: str):
         """Scrape all products for a specific brand on Notino"""
         product_containers = self.load_all_products_for_brand(brand)
-        general_product_details = self.extract_general_product_details(product_containers)
+        with metrics.timer("extract_seconds", extractor="general_product_details"):
+            general_product_details = self.extract_general_product_details(product_containers)
 
-        product_links = self.extract_product_links(product_containers)
+        with metrics.timer("extract_seconds", extractor="product_links"):
+            product_links = self.extract_product_links(product_containers)
+        # The rendered brand page isn't needed anymore, don't keep it while product pages are scraped
+        del product_containers
 
         product_details = []
         for link in product_links:
@@ -210,7 +235,9 @@ class NotinoProductListScraper(BaseListScraper):
 
             response = self.send_request(link)
             soup = self.parse_html(response)
-            product_details.append(self.extract_product_details(soup))
+            with metrics.timer("extract_seconds", extractor="product_details"):
+                product_details.append(self.extract_product_details(soup))
+            soup.decompose()
 
 
     
\ No newline at end of file
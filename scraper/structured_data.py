@@ -0,0 +1,368 @@
+"""Helpers for reading structured data (schema.org JSON-LD or embedded app state) from product pages.
+Reading a JSON document is cheaper and more stable than walking positional CSS selectors,
+so scrapers use it first and fall back to selectors only for fields it doesn't provide."""
+
+import json
+import re
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from data.normalize import VOLUME_PATTERN, parse_price
+from utils.helpers import canonicalize_url
+from utils.metrics import metrics
+
+from logger_config import get_logger
+
+logger = get_logger(__name__)
+
+# Inline scripts assigning app state, e.g. "window.__INITIAL_STATE__ = {...};"
+STATE_ASSIGNMENT_PATTERN = re.compile(r"^\s*(?:window\.)?(__[A-Z_]+__)\s*=\s*", re.MULTILINE)
+
+# Ids of JSON script tags holding app state (Next.js, Apollo)
+STATE_SCRIPT_IDS = ("__NEXT_DATA__", "__APOLLO_STATE__", "__INITIAL_STATE__")
+
+# Maximal depth of app state searched for a product object
+MAX_STATE_DEPTH = 12
+
+
+def extract_json_ld(soup: BeautifulSoup, scripts: list = None) -> list:
+    """Extract all JSON-LD objects from the page, "@graph" containers are flattened
+    Args:
+        soup (BeautifulSoup): The parsed HTML content
+        scripts (list): Already collected script tags of the page, to avoid searching the tree again
+    Returns:
+        list: A list of JSON-LD objects (dictionaries)
+    """
+    if scripts is None:
+        scripts = soup.find_all("script")
+    objects = []
+    for script in scripts:
+        if script.get("type") != "application/ld+json":
+            continue
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            logger.warning("Failed to parse JSON-LD block")
+            continue
+        stack = data if isinstance(data, list) else [data]
+        for item in stack:
+            if not isinstance(item, dict):
+                continue
+            if "@graph" in item:
+                objects.extend(obj for obj in item["@graph"] if isinstance(obj, dict))
+            else:
+                objects.append(item)
+    return objects
+
+
+def _has_type(obj: dict, type_name: str) -> bool:
+    types = obj.get("@type", [])
+    if isinstance(types, str):
+        types = [types]
+    return type_name in types
+
+
+def find_product(objects: list) -> dict:
+    """Find the schema.org Product (or ProductGroup) object
+    Args:
+        objects (list): JSON-LD objects of the page
+    Returns:
+        dict: The product object or None if the page has none
+    """
+    for type_name in ("ProductGroup", "Product"):
+        for obj in objects:
+            if _has_type(obj, type_name):
+                return obj
+    return None
+
+
+def parse_availability(availability) -> bool:
+    """Convert schema.org availability (e.g. "https://schema.org/InStock") to in stock flag"""
+    if not availability:
+        return None
+    return str(availability).rstrip("/").rsplit("/", 1)[-1] in ("InStock", "LimitedAvailability", "OnlineOnly")
+
+
+def parse_volume(text: str) -> str:
+    """Find volume or amount of pieces (e.g. "50 ml") in a variant name"""
+    if not text:
+        return None
+    match = VOLUME_PATTERN.search(text)
+    return match.group(0) if match else text.strip()
+
+
+def _as_list(value) -> list:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def extract_offer_variants(product: dict) -> list:
+    """Extract one record per volume/price variant of a schema.org product.
+    Supports ProductGroup with "hasVariant" products and Product with a list of offers
+    (or AggregateOffer with nested offers).
+    Args:
+        product (dict): The schema.org product object
+    Returns:
+        list: A list of variant dictionaries with volume_or_pcs, price and in_stock
+    """
+    variants = []
+
+    for variant in _as_list(product.get("hasVariant")):
+        for offer in _as_list(variant.get("offers")):
+            variants.append(_offer_to_variant(offer, variant.get("name") or variant.get("size"), variant.get("sku")))
+
+    if not variants:
+        offers = []
+        for offer in _as_list(product.get("offers")):
+            if _has_type(offer, "AggregateOffer") and offer.get("offers"):
+                offers.extend(_as_list(offer["offers"]))
+            else:
+                offers.append(offer)
+        for offer in offers:
+            variants.append(_offer_to_variant(offer, offer.get("name"), offer.get("sku")))
+
+    return [variant for variant in variants if variant.get("price") is not None]
+
+
+def _offer_to_variant(offer: dict, name: str, sku: str) -> dict:
+    variant = {}
+    volume = parse_volume(name)
+    if volume:
+        variant["volume_or_pcs"] = volume
+    if sku:
+        variant["sku"] = str(sku)
+    variant["price"], _ = parse_price(offer.get("price"))
+    in_stock = parse_availability(offer.get("availability"))
+    if in_stock is not None:
+        variant["in_stock"] = in_stock
+    return variant
+
+
+def extract_embedded_state(soup: BeautifulSoup, scripts: list = None) -> list:
+    """Extract app state JSON documents embedded by the site frontend
+    (JSON script tags like __NEXT_DATA__ or inline "window.__STATE__ = {...}" assignments)
+    Args:
+        soup (BeautifulSoup): The parsed HTML content
+        scripts (list): Already collected script tags of the page
+    Returns:
+        list: A list of parsed state documents
+    """
+    if scripts is None:
+        scripts = soup.find_all("script")
+    states = []
+    for script in scripts:
+        text = script.string
+        if not text:
+            continue
+        try:
+            if script.get("id") in STATE_SCRIPT_IDS or (
+                    script.get("type") == "application/json" and "state" in (script.get("id") or "").lower()):
+                states.append(json.loads(text))
+                continue
+            match = STATE_ASSIGNMENT_PATTERN.search(text)
+            if match is not None:
+                # Parse only the assigned object, the script can continue with other code
+                states.append(json.JSONDecoder().raw_decode(text, match.end())[0])
+        except ValueError:
+            continue
+    return states
+
+
+def _looks_like_product(obj: dict) -> bool:
+    return "name" in obj and ("price" in obj or "offers" in obj or "brand" in obj)
+
+
+def _normalize_name(name) -> str:
+    return " ".join(str(name).casefold().split()) if name else ""
+
+
+def _url_path(url: str) -> str:
+    return urlsplit(url).path.rstrip("/")
+
+
+def get_page_identity(soup: BeautifulSoup, page_url: str = None) -> dict:
+    """Identity of the product a page is about, used to recognise its object in app state
+    Args:
+        soup (BeautifulSoup): The parsed HTML content
+        page_url (str): URL the page was fetched from, used if it has no canonical link or og:url
+    Returns:
+        dict: Canonical "url", "sku" and "title" (og:title) of the page, missing ones are left out
+    """
+    identity = {}
+    canonical = soup.find("link", rel="canonical")
+    og_url = soup.find("meta", property="og:url")
+    url = (canonical.get("href") if canonical else None) or (og_url.get("content") if og_url else None) or page_url
+    if url:
+        identity["url"] = canonicalize_url(urljoin(page_url or "", url))
+    sku = soup.find(itemprop="sku")
+    if sku is not None:
+        identity["sku"] = (sku.get("content") or sku.get_text()).strip()
+    title = soup.find("meta", property="og:title")
+    if title is not None and title.get("content"):
+        # Titles often end with the site name, e.g. "Dior Sauvage | Douglas"
+        identity["title"] = _normalize_name(title["content"].split("|")[0])
+    return {key: value for key, value in identity.items() if value}
+
+
+def _identifier_match(obj: dict, identity: dict) -> bool:
+    """Compare URL and SKU of a product-like object with the page
+    Returns:
+        bool: True if one of them matches, False if one contradicts the page, None if none can be compared
+    """
+    result = None
+    if identity.get("url"):
+        for field in ("url", "canonicalUrl", "href", "link"):
+            url = obj.get(field)
+            if isinstance(url, str) and url:
+                if _url_path(canonicalize_url(urljoin(identity["url"], url))) == _url_path(identity["url"]):
+                    return True
+                result = False
+    if identity.get("sku") and obj.get("sku") is not None:
+        if str(obj["sku"]).strip() == identity["sku"]:
+            return True
+        result = False
+    return result
+
+
+def _name_match(obj: dict, identity: dict) -> bool:
+    """Whether the name (optionally preceded by the brand) of a product-like object is the page title"""
+    if not identity.get("title"):
+        return False
+    name = _normalize_name(_text(obj.get("name")))
+    brand = _normalize_name(_text(obj.get("brand")))
+    return bool(name) and identity["title"] in (name, f"{brand} {name}")
+
+
+def matches_page(obj: dict, identity: dict) -> bool:
+    """Whether a product-like state object is the product of the page (and not e.g. a cart item,
+    breadcrumb or recommended product): its URL or SKU has to match the page, or if it has neither,
+    its name has to be the page title
+    Args:
+        obj (dict): The product-like object
+        identity (dict): Identity of the page from get_page_identity()
+    Returns:
+        bool: True if the object describes the page product
+    """
+    identifier_match = _identifier_match(obj, identity)
+    if identifier_match is not None:
+        return identifier_match
+    return _name_match(obj, identity)
+
+
+def iter_state_products(state, depth: int = 0):
+    """Yield product-like objects (with name and price or brand) of app state in document order
+    Args:
+        state: Parsed app state document or its part
+        depth (int): Current depth of the search
+    Yields:
+        dict: The product-like objects
+    """
+    if depth > MAX_STATE_DEPTH:
+        return
+    if isinstance(state, dict):
+        if _looks_like_product(state):
+            yield state
+        children = state.values()
+    elif isinstance(state, list):
+        children = state
+    else:
+        return
+    for child in children:
+        if isinstance(child, (dict, list)):
+            yield from iter_state_products(child, depth + 1)
+
+
+def find_state_product(state, identity: dict) -> dict:
+    """Find the product of the page in app state. Objects matching the page URL or SKU are preferred
+    over objects matching only by name, objects with a different URL or SKU are never used
+    Args:
+        state: Parsed app state document
+        identity (dict): Identity of the page from get_page_identity()
+    Returns:
+        dict: The product-like object matching the page or None
+    """
+    name_matches = []
+    for obj in iter_state_products(state):
+        identifier_match = _identifier_match(obj, identity)
+        if identifier_match:
+            return obj
+        if identifier_match is None and _name_match(obj, identity):
+            name_matches.append(obj)
+    return name_matches[0] if name_matches else None
+
+
+def _text(value) -> str:
+    """Get text of a schema.org value that can be a string or an object with name"""
+    if isinstance(value, dict):
+        value = value.get("name")
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def _product_fields(product: dict) -> dict:
+    """Map a schema.org or app state product object to product details fields"""
+    fields = {
+        "name": _text(product.get("name")),
+        "brand": _text(product.get("brand")),
+        "description": _text(product.get("description")),
+        "category": _text(product.get("category")),
+        "sku": _text(product.get("sku")),
+    }
+
+    images = _as_list(product.get("image"))
+    image_urls = [image.get("url") if isinstance(image, dict) else image for image in images]
+    fields["image_urls"] = [url for url in image_urls if isinstance(url, str)] or None
+
+    offers = _as_list(product.get("offers"))
+    offer = offers[0] if offers and isinstance(offers[0], dict) else {}
+    price = offer.get("price", offer.get("lowPrice", product.get("price")))
+    currency = offer.get("priceCurrency", product.get("currency"))
+    if isinstance(price, dict):
+        # App state often keeps price as {"value": ..., "currency": ...}
+        currency = price.get("currency", currency)
+        price = price.get("value")
+    fields["price"], _ = parse_price(price)
+    fields["currency"] = _text(currency)
+
+    availability = offer.get("availability", product.get("availability"))
+    fields["in_stock"] = parse_availability(availability)
+    if fields["in_stock"] is None and isinstance(product.get("inStock"), bool):
+        fields["in_stock"] = product["inStock"]
+
+    return {key: value for key, value in fields.items() if value is not None}
+
+
+def extract_structured_product(soup: BeautifulSoup, page_url: str = None) -> tuple:
+    """Read product details from JSON-LD, or from embedded app state if the page has no JSON-LD product.
+    App state objects are used only if they match the page URL, SKU or title
+    Args:
+        soup (BeautifulSoup): The parsed HTML content
+        page_url (str): URL the page was fetched from
+    Returns:
+        tuple: (product details dictionary, raw product object or None). Details can contain
+            name, brand, description, category, sku, image_urls, price, currency and in_stock
+    """
+    scripts = soup.find_all("script")
+
+    product = find_product(extract_json_ld(soup, scripts))
+    source = "json_ld"
+    if product is None:
+        source = "state"
+        identity = get_page_identity(soup, page_url)
+        states = extract_embedded_state(soup, scripts) if identity else []
+        for state in states:
+            product = find_state_product(state, identity)
+            if product is not None:
+                break
+
+    if product is None:
+        metrics.increment("structured_data_total", source="none")
+        return {}, None
+
+    metrics.increment("structured_data_total", source=source)
+    return _product_fields(product), product
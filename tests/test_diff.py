@@ -0,0 +1,61 @@
+import json
+import os
+
+from data import storage
+from data.diff import diff_sorted_snapshots, diff_indexed_snapshots
+from data.storage import product_key
+
+
+def write_snapshot(path, products):
+    with open(path, "w", encoding="utf-8") as file:
+        for product in sorted(products, key=product_key):
+            file.write(json.dumps(product) + "\n")
+    return str(path)
+
+
+def count_changes(changes):
+    counts = {}
+    for change in changes:
+        counts[change["change"]] = counts.get(change["change"], 0) + 1
+    return counts
+
+
+def product(number, price, in_stock=True):
+    return {"url": f"https://www.douglas.lv/p/{number}", "name": f"Product {number}",
+            "volume_or_pcs": "50 ml", "price": price, "in_stock": in_stock}
+
+
+def test_sorted_and_indexed_diff_agree_with_duplicate_keys(tmp_path):
+    # Products 0-9 are listed twice in the previous run, 0-4 are listed twice in the current run
+    previous = [product(number, 20.0) for number in range(10)] * 2 + [product(10, 5.0)]
+    current = [product(number, 15.0) for number in range(10)] + [product(number, 15.0) for number in range(5)] \
+        + [product(11, 7.0)]
+    previous_path = write_snapshot(tmp_path / "previous.jsonl", previous)
+    current_path = write_snapshot(tmp_path / "current.jsonl", current)
+
+    sorted_counts = count_changes(diff_sorted_snapshots(previous_path, current_path))
+    indexed_counts = count_changes(diff_indexed_snapshots(previous_path, current_path))
+
+    assert sorted_counts == indexed_counts == {"price_drop": 10, "removed": 1, "new": 1}
+
+
+def test_sorted_and_indexed_diff_agree_on_stock_changes(tmp_path):
+    previous_path = write_snapshot(tmp_path / "previous.jsonl", [product(1, 10.0), product(2, 10.0, False)])
+    current_path = write_snapshot(tmp_path / "current.jsonl", [product(1, 12.0, False), product(2, 10.0)])
+
+    sorted_changes = list(diff_sorted_snapshots(previous_path, current_path))
+    indexed_changes = list(diff_indexed_snapshots(previous_path, current_path))
+
+    key = lambda change: (change["key"], change["change"])
+    assert sorted(sorted_changes, key=key) == sorted(indexed_changes, key=key)
+    assert count_changes(sorted_changes) == {"price_rise": 1, "out_of_stock": 1, "back_in_stock": 1}
+
+
+def test_save_snapshot_keeps_one_record_per_key(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "SNAPSHOTS_DIR", str(tmp_path))
+    path = storage.save_snapshot([product(2, 1.0), product(1, 1.0), product(2, 1.0)], "douglas", "full")
+
+    assert os.path.dirname(path) == str(tmp_path)
+    assert [record["url"] for record in storage.load_snapshot(path)] == [
+        "https://www.douglas.lv/p/1", "https://www.douglas.lv/p/2",
+    ]
@@ -0,0 +1,59 @@
+import glob
+import io
+import json
+import logging
+
+import pytest
+
+from logger_config import BatchWriteHandler, configure_logging, shutdown_logging
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+def read_log(log_dir):
+    (path,) = glob.glob(str(log_dir / "logs" / "*.log"))
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def test_queue_mode_keeps_exception_in_json_records(log_dir):
+    configure_logging(use_queue=True, json_format=True)
+    logger = logging.getLogger("tests.scraper")
+    try:
+        raise ValueError("bad price")
+    except ValueError:
+        logger.exception("Failed to parse product %s", "Sauvage")
+    shutdown_logging()
+
+    (entry,) = [json.loads(line) for line in read_log(log_dir).splitlines()]
+    assert entry["message"] == "Failed to parse product Sauvage"
+    assert "Traceback" in entry["exception"] and "ValueError: bad price" in entry["exception"]
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def test_batch_write_handler_writes_a_batch_at_once():
+    stream = CountingStream()
+    handler = BatchWriteHandler(3, flushLevel=logging.ERROR, target=logging.StreamHandler(stream))
+    for message in ("first", "second", "third"):
+        handler.handle(logging.makeLogRecord({"msg": message, "levelno": logging.INFO, "levelname": "INFO"}))
+
+    assert stream.getvalue().splitlines() == ["first", "second", "third"]
+    assert stream.writes == 1
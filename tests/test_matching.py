@@ -0,0 +1,28 @@
+from data.matching import build_comparison, name_tokens, normalize_brand
+
+
+def test_latvian_and_english_eau_de_parfum_names_have_the_same_tokens():
+    brand = normalize_brand("Lancôme")
+
+    assert name_tokens("La Vie Est Belle parfimērijas ūdens", brand) == name_tokens("La Vie Est Belle Eau de Parfum", brand)
+    assert name_tokens("Sauvage tualetes ūdens", "dior") == name_tokens("Sauvage Eau de Toilette", "dior")
+
+
+def test_products_of_both_sites_are_matched():
+    sites = {
+        "douglas": [
+            {"brand": "Lancôme", "name": "La Vie Est Belle parfimērijas ūdens", "volume_or_pcs": "50 ml", "price": 98.0},
+            {"brand": "Dior", "name": "Sauvage tualetes ūdens", "volume_or_pcs": "100 ml", "price": 115.0},
+        ],
+        "notino": [
+            {"brand": "Lancome", "name": "La Vie Est Belle Eau de Parfum", "volume_or_pcs": "0,05 l", "price": 84.5},
+            {"brand": "DIOR", "name": "Sauvage Eau de Toilette", "volume_or_pcs": "100 ml", "price": 99.0},
+            {"brand": "DIOR", "name": "Sauvage Eau de Parfum", "volume_or_pcs": "100 ml", "price": 121.0},
+        ],
+    }
+
+    rows = {row["name"]: row for row in build_comparison(sites)}
+
+    assert rows["La Vie Est Belle parfimērijas ūdens"]["notino_price"] == 84.5
+    assert rows["Sauvage tualetes ūdens"]["notino_name"] == "Sauvage Eau de Toilette"
+    assert rows["Sauvage tualetes ūdens"]["notino_price"] == 99.0
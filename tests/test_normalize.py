@@ -0,0 +1,48 @@
+from data.diff import compare_products
+from data.normalize import normalize_records, parse_price, parse_volume
+from scraper.structured_data import extract_offer_variants
+
+PRICES = ["12,50 €", "1.234,56 €", "1 234,56", "1,234.56", "12.50", 7.5, "MULTIPLE_VALUES", "", None]
+EXPECTED_PRICES = [12.5, 1234.56, 1234.56, 1234.56, 12.5, 7.5, None, None, None]
+
+VOLUMES = ["50 ml", "0,1 l", "2 gab.", "100 g", "L'Eau de Parfum 30ml", "One size", None]
+EXPECTED_VOLUMES = [(50.0, "ml"), (100.0, "ml"), (2.0, "pcs"), (100.0, "g"), (30.0, "ml"), (None, None), (None, None)]
+
+
+def test_parse_price():
+    assert [parse_price(price)[0] for price in PRICES] == EXPECTED_PRICES
+    assert parse_price("MULTIPLE_VALUES") == (None, "MULTIPLE_VALUES")
+    assert parse_price("Nav pieejams") == (None, "Nav pieejams")
+
+
+def test_parse_volume():
+    assert [parse_volume(volume) for volume in VOLUMES] == EXPECTED_VOLUMES
+
+
+def test_normalize_records():
+    records = normalize_records([
+        {"name": "A", "price": "12,50 €", "old_price": "15,00 €", "volume_or_pcs": "0,1 l"},
+        {"name": "B", "price": "MULTIPLE_VALUES", "volume_or_pcs": "50 ml"},
+        {"name": "C", "price": "19.99", "in_stock": False, "volume_or_pcs": "2 gab."},
+    ])
+
+    assert records[0] == {"name": "A", "price": 12.5, "old_price": 15.0, "currency": "EUR", "in_stock": True,
+                          "volume_or_pcs": "0,1 l", "volume_value": 100.0, "volume_unit": "ml"}
+    assert records[1]["price_note"] == "MULTIPLE_VALUES" and records[1]["in_stock"] is False
+    assert "price" not in records[1]
+    assert records[2]["in_stock"] is False and records[2]["volume_unit"] == "pcs"
+
+
+def test_normalize_records_is_idempotent():
+    records = normalize_records([{"price": "1.234,56 €", "old_price": "2 000,00", "volume_or_pcs": "0,1 l"}])
+
+    assert normalize_records(records) == records
+    assert records[0]["old_price"] == 2000.0
+
+
+def test_structured_data_and_diff_parse_prices_the_same_way():
+    product = {"offers": [{"name": "50 ml", "price": "1.234,56"}, {"name": "100 ml", "price": "1 834,56"}]}
+
+    assert [variant["price"] for variant in extract_offer_variants(product)] == [1234.56, 1834.56]
+    (change,) = compare_products("key", {"price": "1.234,56"}, {"price": "1 034,56"})
+    assert change["change"] == "price_drop" and change["price_change"] == -200.0
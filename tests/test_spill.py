@@ -0,0 +1,45 @@
+import os
+
+from data.dedupe import DetailsCache
+from data.spill import SpillBuffer, estimate_size
+from data.storage import product_key
+
+
+def product(number):
+    return {"url": f"https://www.douglas.lv/p/{number:03d}", "name": f"Product {number}", "price": float(number)}
+
+
+def test_spilled_records_are_merged_in_key_order(tmp_path):
+    products = [product(number) for number in (5, 3, 9, 1, 7, 2, 8, 4, 6, 0)]
+    with SpillBuffer(estimate_size(products[0]) * 3 / (1024 * 1024), str(tmp_path / "spill")) as buffer:
+        buffer.extend(products)
+
+        assert buffer.spilled
+        assert len(buffer) == len(products)
+        assert sorted(map(product_key, buffer)) == sorted(map(product_key, products))
+        assert [record["url"] for record in buffer.iter_sorted()] == [product(number)["url"] for number in range(10)]
+
+    assert os.listdir(tmp_path / "spill") == []
+
+
+def test_update_records_rewrites_spilled_chunks(tmp_path):
+    with SpillBuffer(estimate_size(product(0)) * 2 / (1024 * 1024), str(tmp_path / "spill")) as buffer:
+        buffer.extend(product(number) for number in range(5))
+        buffer.update_records(lambda record: record.update(image_files=[record["name"]]))
+
+        assert all(record["image_files"] == [record["name"]] for record in buffer)
+        assert buffer.columns == ["url", "name", "price", "image_files"]
+
+
+def test_details_cache_evicts_least_recently_used_over_budget():
+    details = {"name": "Product", "about": "x" * 1000}
+    cache = DetailsCache(estimate_size(details) * 2.5 / (1024 * 1024))
+    cache.add("https://www.douglas.lv/p/1", details)
+    cache.add("https://www.douglas.lv/p/2", details)
+    cache.get_by_url("https://www.douglas.lv/p/1")
+    cache.add("https://www.douglas.lv/p/3", details)
+
+    assert "https://www.douglas.lv/p/1" in cache
+    assert "https://www.douglas.lv/p/2" not in cache
+    assert "https://www.douglas.lv/p/3" in cache
+    assert cache.size <= cache.max_size
@@ -0,0 +1,57 @@
+import json
+
+from data import storage
+from data.storage import merge_with_snapshot, product_key
+
+URL = "https://www.douglas.lv/p/sauvage"
+
+
+def write_snapshot(path, products):
+    with open(path, "w", encoding="utf-8") as file:
+        for product in sorted(products, key=product_key):
+            file.write(json.dumps(product) + "\n")
+    return str(path)
+
+
+def test_variants_differing_only_by_sku_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "SNAPSHOTS_DIR", str(tmp_path))
+    variants = [{"url": URL, "name": "Sauvage", "sku": "A1", "price": 20.0},
+                {"url": URL, "name": "Sauvage", "sku": "A2", "price": 30.0}]
+
+    path = storage.save_snapshot(variants + variants[:1], "douglas", "full")
+
+    assert [(record["sku"], record["price"]) for record in storage.load_snapshot(path)] == [("A1", 20.0), ("A2", 30.0)]
+
+
+def test_sweep_keeps_snapshot_variants_of_each_listed_product_once(tmp_path):
+    snapshot = [
+        {"url": URL, "name": "Sauvage", "volume_or_pcs": "60 ml", "price": 60.0, "about": "Fresh", "in_stock": True},
+        {"url": URL, "name": "Sauvage", "volume_or_pcs": "100 ml", "price": 90.0, "about": "Fresh", "in_stock": True},
+        {"url": URL, "name": "Sauvage", "volume_or_pcs": "100 ml", "price": 90.0, "about": "Fresh", "in_stock": True},
+    ]
+    listing = [{"url": URL, "name": "Sauvage (new)", "price_note": "MULTIPLE_VALUES", "in_stock": False}] * 2
+
+    merged = list(merge_with_snapshot(listing, write_snapshot(tmp_path / "full.jsonl", snapshot)))
+
+    assert [(record["volume_or_pcs"], record["price"]) for record in merged] == [("100 ml", 90.0), ("60 ml", 60.0)]
+    assert all(record["name"] == "Sauvage (new)" and record["about"] == "Fresh" for record in merged)
+
+
+def test_sweep_keeps_snapshot_price_of_single_record_without_listing_price(tmp_path):
+    snapshot = [{"url": URL, "name": "Sauvage", "volume_or_pcs": "60 ml", "price": 60.0, "about": "Fresh"}]
+    listing = [{"url": URL, "name": "Sauvage", "price_note": "MULTIPLE_VALUES", "in_stock": False}]
+
+    (merged,) = merge_with_snapshot(listing, write_snapshot(tmp_path / "full.jsonl", snapshot))
+
+    assert merged["price"] == 60.0 and merged["volume_or_pcs"] == "60 ml"
+
+
+def test_sweep_takes_price_and_stock_from_listing(tmp_path):
+    snapshot = [{"url": URL, "name": "Sauvage", "price": 60.0, "old_price": 80.0, "about": "Fresh", "in_stock": True}]
+    listing = [{"url": URL, "name": "Sauvage", "price": 55.0, "in_stock": True},
+               {"url": URL + "-new", "name": "New", "price": 10.0, "in_stock": True}]
+
+    merged = list(merge_with_snapshot(listing, write_snapshot(tmp_path / "full.jsonl", snapshot)))
+
+    assert merged[0] == {"url": URL, "name": "Sauvage", "price": 55.0, "about": "Fresh", "in_stock": True}
+    assert merged[1] == listing[1]
@@ -0,0 +1,48 @@
+import json
+
+from bs4 import BeautifulSoup
+
+from scraper.structured_data import extract_structured_product
+
+PAGE_URL = "https://www.douglas.lv/dior/sauvage-elixir/"
+
+RECOMMENDED = {"name": "Sauvage", "brand": "Dior", "url": "/dior/sauvage/", "price": 60,
+               "description": "Recommended product"}
+PAGE_PRODUCT = {"name": "Sauvage Elixir", "brand": "Dior", "url": "/dior/sauvage-elixir/?utm_source=app", "price": 145,
+                "description": "Product of the page"}
+
+
+def page(state, canonical=PAGE_URL, title="Dior Sauvage Elixir parfum"):
+    return BeautifulSoup(f"""<html><head>
+        <link rel="canonical" href="{canonical}">
+        <meta property="og:title" content="{title}">
+        <script>window.__INITIAL_STATE__ = {json.dumps(state)};</script>
+        </head><body></body></html>""", "html.parser")
+
+
+def test_recommended_product_before_page_product_is_skipped():
+    state = {"recommendations": [RECOMMENDED], "product": PAGE_PRODUCT}
+
+    details, _ = extract_structured_product(page(state), PAGE_URL)
+
+    assert details["description"] == "Product of the page"
+    assert details["price"] == 145.0
+
+
+def test_product_with_other_url_is_not_used_even_if_name_is_in_title():
+    state = {"recommendations": [RECOMMENDED], "cart": [{"name": "Sauvage Elixir parfum", "sku": "123", "price": 1}]}
+
+    details, product = extract_structured_product(page(state), PAGE_URL)
+
+    assert details == {} and product is None
+
+
+def test_product_without_url_matches_by_exact_name():
+    state = {
+        "breadcrumb": [{"name": "Sauvage", "brand": "Dior"}],
+        "product": {"name": "Sauvage Elixir", "brand": "Dior", "price": "145,00"},
+    }
+
+    details, _ = extract_structured_product(page(state, title="Dior Sauvage Elixir | Douglas"), PAGE_URL)
+
+    assert details["name"] == "Sauvage Elixir"
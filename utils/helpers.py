@@ -0,0 +1,41 @@
+"""Helper functions shared across the application."""
+
+from importlib import import_module
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+def import_object(path: str):
+    """Import an object by its "package.module:attribute" path.
+    Used by site and sink registries, so heavy modules are imported only when actually used.
+    Args:
+        path (str): Path of the object, e.g. "data.storage:save_products_to_excel"
+    Returns:
+        object: The imported object
+    """
+    module_name, _, attribute = path.partition(":")
+    return getattr(import_module(module_name), attribute)
+
+
+# Query parameters that don't change page content and only break deduplication
+TRACKING_QUERY_PARAMETERS = ("utm_", "gclid", "fbclid", "yclid", "_ga", "mc_")
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalise a product URL so that the same page always has the same URL.
+    Scheme and host are lowercased, default ports, fragments and tracking parameters are dropped
+    and remaining query parameters are sorted.
+    Args:
+        url (str): The URL to normalise
+    Returns:
+        str: The canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(":", 1)[-1]) in (("http", "80"), ("https", "443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_QUERY_PARAMETERS)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
@@ -0,0 +1,216 @@
+"""Performance instrumentation for scrapers.
+Collects counters and timing histograms for every stage of a run
+(requests, parsing, extraction, throttling sleeps, saving) and exports them
+as a JSON summary or as a Prometheus text exposition file."""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds of histogram buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels_key(labels: dict) -> tuple:
+    """Convert labels dictionary to a hashable, ordered key"""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels_key: tuple, extra: dict = None) -> str:
+    """Format labels in Prometheus exposition syntax"""
+    pairs = list(labels_key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    """A cumulative histogram of observed values
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets
+        bucket_counts (list): Number of observations per bucket (not cumulative)
+        count (int): Total number of observations
+        sum (float): Sum of all observations
+        min (float): Smallest observation
+        max (float): Largest observation
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        """Record a single observation
+        Args:
+            value (float): The observed value
+        """
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def to_dict(self) -> dict:
+        """Summarize the histogram
+        Returns:
+            dict: count, sum, mean, min, max and cumulative bucket counts
+        """
+        cumulative = 0
+        buckets = {}
+        for upper_bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            buckets[str(upper_bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of counters and histograms for a single run
+    Attributes:
+        counters (dict): Counter values keyed by (name, labels)
+        histograms (dict): Histograms keyed by (name, labels)
+        started_at (float): Time when collection started
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all collected values and restart the run clock"""
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.perf_counter()
+
+    def increment(self, name: str, value: int = 1, **labels):
+        """Increment a counter
+        Args:
+            name (str): The counter name
+            value (int): The amount to add
+            **labels: Labels distinguishing series of the same counter
+        """
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record an observation in a histogram
+        Args:
+            name (str): The histogram name
+            value (float): The observed value, usually duration in seconds
+            **labels: Labels distinguishing series of the same histogram
+        """
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Measure the duration of the wrapped block into a histogram
+        Args:
+            name (str): The histogram name
+            **labels: Labels distinguishing series of the same histogram
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get_counter(self, name: str, **labels) -> int:
+        """Get current value of a counter, summed over all labels if none are given"""
+        with self._lock:
+            if labels:
+                return self.counters.get((name, _labels_key(labels)), 0)
+            return sum(value for (counter_name, _), value in self.counters.items() if counter_name == name)
+
+    def summary(self) -> dict:
+        """Build a JSON serializable summary of the run
+        Returns:
+            dict: elapsed time, throughput, counters and histograms
+        """
+        elapsed = time.perf_counter() - self.started_at
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            histograms = [
+                {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0])
+            ]
+        throughput = {
+            f"{unit}_per_second": round(self.get_counter(f"{unit}_total") / elapsed, 4) if elapsed else None
+            for unit in ("requests", "pages", "products")
+        }
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "throughput": throughput,
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def to_prometheus(self) -> str:
+        """Render collected metrics in Prometheus text exposition format
+        Returns:
+            str: The exposition text
+        """
+        lines = []
+        with self._lock:
+            counter_names = sorted({name for name, _ in self.counters})
+            for name in counter_names:
+                lines.append(f"# TYPE scraper_{name} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"scraper_{name}{_format_labels(labels)} {value}")
+
+            histogram_names = sorted({name for name, _ in self.histograms})
+            for name in histogram_names:
+                lines.append(f"# TYPE scraper_{name} histogram")
+                for (histogram_name, labels), histogram in sorted(self.histograms.items(), key=lambda item: item[0]):
+                    if histogram_name != name:
+                        continue
+                    for upper_bound, cumulative in histogram.to_dict()["buckets"].items():
+                        lines.append(f"scraper_{name}_bucket{_format_labels(labels, {'le': upper_bound})} {cumulative}")
+                    lines.append(f"scraper_{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"scraper_{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, file_path: str):
+        """Write the run summary to a JSON file
+        Args:
+            file_path (str): Path of the output file
+        """
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.summary(), file, indent=2, ensure_ascii=False)
+
+    def write_prometheus(self, file_path: str):
+        """Write collected metrics to a Prometheus text file (e.g. for node_exporter textfile collector)
+        Args:
+            file_path (str): Path of the output file
+        """
+        with open(file_path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+
+
+# Shared registry for the whole run
+metrics = Metrics()